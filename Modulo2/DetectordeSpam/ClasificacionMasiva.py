@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Clasificación masiva de un archivo de mensajes con un modelo NaiveBayes.
+
+La entrada (CSV o texto con un mensaje por línea) se lee por bloques y cada bloque
+se puntúa con predict_many; los resultados se escriben al CSV de salida a medida
+que se producen, así que la memoria no depende del tamaño del archivo.
+
+    python ClasificacionMasiva.py modelo_spam.nbm mensajes.csv resultados.csv
+"""
+import argparse
+import csv
+import time
+
+import chardet
+import pandas as pd
+
+from NaiveBayes import NaiveBayes
+
+# Nombres de columna que se reconocen como texto del mensaje en un CSV
+COLUMNAS_TEXTO = ('texto', 'message', 'mensaje', 'text', 'sms', 'body')
+
+
+def _detectar_codificacion(ruta):
+    with open(ruta, 'rb') as f:
+        return chardet.detect(f.read(100000))['encoding'] or 'utf-8'
+
+
+def leer_bloques(ruta, tamano_bloque=10000, columna=None):
+    """Genera listas de mensajes de a lo sumo tamano_bloque elementos"""
+    codificacion = _detectar_codificacion(ruta)
+    if ruta.lower().endswith('.csv'):
+        lector = pd.read_csv(ruta, encoding=codificacion, encoding_errors='replace',
+                             chunksize=tamano_bloque, dtype=str, keep_default_na=False)
+        for bloque in lector:
+            if columna is None:
+                # Columna con un nombre conocido o, si no hay, la última (etiqueta,texto -> texto)
+                nombres = {nombre.strip().lower(): nombre for nombre in bloque.columns}
+                columna = next((nombres[n] for n in COLUMNAS_TEXTO if n in nombres), bloque.columns[-1])
+            yield bloque[columna].tolist()
+    else:
+        with open(ruta, encoding=codificacion, errors='replace') as f:
+            bloque = []
+            for linea in f:
+                linea = linea.strip()
+                if linea:
+                    bloque.append(linea)
+                if len(bloque) >= tamano_bloque:
+                    yield bloque
+                    bloque = []
+            if bloque:
+                yield bloque
+
+
+def clasificar_archivo(model, ruta_entrada, ruta_salida, tamano_bloque=10000, columna=None,
+                       progress=None, cancel_event=None):
+    """
+    Clasifica todos los mensajes de ruta_entrada y escribe ruta_salida con las columnas
+    numero, etiqueta, probabilidad_spam y texto. progress(resumen) se llama tras cada
+    bloque; si cancel_event se activa se detiene entre bloques.
+    Devuelve un resumen con totales, tiempo y mensajes por segundo.
+    """
+    if not model.is_trained:
+        raise ValueError("El modelo no ha sido entrenado")
+
+    resumen = {'total': 0, 'spam': 0, 'ham': 0, 'segundos': 0.0, 'mensajes_por_segundo': 0.0, 'cancelado': False}
+    inicio = time.perf_counter()
+    with open(ruta_salida, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['numero', 'etiqueta', 'probabilidad_spam', 'texto'])
+        for bloque in leer_bloques(ruta_entrada, tamano_bloque, columna):
+            if cancel_event is not None and cancel_event.is_set():
+                resumen['cancelado'] = True
+                break
+            resultado = model.predict_many(bloque)
+            es_spam = resultado['is_spam']
+            primero = resumen['total']
+            escritor.writerows(
+                (primero + i, 'spam' if spam else 'ham', f"{probabilidad:.6f}", texto)
+                for i, (spam, probabilidad, texto) in enumerate(zip(es_spam, resultado['probability_spam'], bloque))
+            )
+            n_spam = int(es_spam.sum())
+            resumen['total'] += len(bloque)
+            resumen['spam'] += n_spam
+            resumen['ham'] += len(bloque) - n_spam
+            resumen['segundos'] = time.perf_counter() - inicio
+            resumen['mensajes_por_segundo'] = resumen['total'] / resumen['segundos'] if resumen['segundos'] else 0.0
+            if progress is not None:
+                progress(dict(resumen))
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    resumen['mensajes_por_segundo'] = resumen['total'] / resumen['segundos'] if resumen['segundos'] else 0.0
+    return resumen
+
+
+def formatear_resumen(resumen):
+    spam_ratio = resumen['spam'] / resumen['total'] if resumen['total'] else 0.0
+    return (f"{resumen['total']} mensajes en {resumen['segundos']:.2f} s "
+            f"({resumen['mensajes_por_segundo']:.0f} mensajes/s): "
+            f"{resumen['spam']} spam ({spam_ratio:.1%}), {resumen['ham']} no spam")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clasifica todos los mensajes de un archivo")
+    parser.add_argument('modelo', help="archivo .nbm guardado con NaiveBayes.save")
+    parser.add_argument('entrada', help="CSV o archivo de texto con un mensaje por línea")
+    parser.add_argument('salida', help="CSV de resultados")
+    parser.add_argument('--bloque', type=int, default=10000, help="mensajes por bloque")
+    parser.add_argument('--columna', help="columna del CSV con el texto (por defecto se detecta)")
+    args = parser.parse_args()
+
+    model = NaiveBayes.load(args.modelo)
+    resumen = clasificar_archivo(
+        model, args.entrada, args.salida, args.bloque, args.columna,
+        progress=lambda parcial: print(f"{parcial['total']} mensajes, {parcial['mensajes_por_segundo']:.0f} mensajes/s",
+                                       flush=True)
+    )
+    print(formatear_resumen(resumen))
+
+
+if __name__ == "__main__":
+    main()
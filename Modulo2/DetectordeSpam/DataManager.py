@@ -1,30 +1,173 @@
+import hashlib
+import io
+import json
+import os
+import numpy as np
 import pandas as pd
 import chardet
+from Duplicados import agrupar_duplicados, colapsar
+from Perfilador import etapa
 
 class DataManager:
    # Clase para manejar la carga y preprocesamiento de datos
     
-    def __init__(self):
+    # Versión del formato de la caché columnar; al cambiar la limpieza se incrementa
+    CACHE_VERSION = 1
+    
+    def __init__(self, use_cache=True, cache_dir=None, deduplicate=True, near_duplicates=True,
+                 similarity_threshold=0.8):
         self.data = None
         self.encoding = None
+        # Colapsar duplicados exactos (y casi duplicados, con MinHash/LSH) en filas con peso
+        self.deduplicate = deduplicate
+        self.near_duplicates = near_duplicates
+        self.similarity_threshold = similarity_threshold
+        self.original_count = 0
+        # Caché de datos ya limpios; por defecto en .cache_datos junto al CSV
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self._hash_memo = {}
+        # Ruta base (directorio/hash) de la entrada de caché del archivo cargado, o None
+        self._cache_base = None
+        # Perfilador opcional que mide cada etapa de load_data
+        self.perfilador = None
     
-    def load_data(self, file_path):
-        # Carga y procesa el archivo CSV
+    def load_data(self, file_path, cancel_event=None):
+        # Carga y procesa el archivo CSV; si cancel_event se activa se detiene entre pasos
+        self._cache_base = None
+        cancelled = (False, "Carga de datos cancelada")
+        
+        def cancel_requested():
+            return cancel_event is not None and cancel_event.is_set()
+        
         try:
+            # Camino rápido: columnas ya limpias de una carga anterior del mismo contenido
+            if self.use_cache:
+                with etapa(self.perfilador, "Lectura de caché"):
+                    cached = self._load_cached(file_path)
+                if cached is not None:
+                    self.data = cached
+                    if cancel_requested():
+                        return cancelled
+                    self._deduplicate()
+                    return True, "Datos cargados exitosamente (desde caché)"
+            
             # Detectar codificación
-            self._detect_encoding(file_path)
+            with etapa(self.perfilador, "Detección de codificación"):
+                self._detect_encoding(file_path)
+            if cancel_requested():
+                return cancelled
             
             # Leer archivo
-            self.data = self._read_csv_with_encoding(file_path)
+            with etapa(self.perfilador, "Lectura del CSV"):
+                self.data = self._read_csv_with_encoding(file_path)
+            if cancel_requested():
+                return cancelled
             
             # Procesar datos
-            self._process_data()
+            with etapa(self.perfilador, "Procesamiento de datos"):
+                self._process_data()
+            
+            if self.use_cache:
+                with etapa(self.perfilador, "Guardado de caché"):
+                    self._store_cache(file_path)
+            if cancel_requested():
+                return cancelled
+            
+            self._deduplicate()
             
             return True, "Datos cargados exitosamente"
             
         except Exception as e:
             return False, f"Error al cargar datos: {str(e)}"
     
+    def _cache_paths(self, file_path):
+        directorio = self.cache_dir or os.path.join(os.path.dirname(os.path.abspath(file_path)), '.cache_datos')
+        return directorio, os.path.join(directorio, 'indice.json')
+    
+    def _content_hash(self, file_path, indice):
+        # Si ruta, tamaño y fecha coinciden con el índice se confía en el hash guardado;
+        # si no, se recalcula sobre el contenido (un archivo solo "tocado" sigue acertando)
+        clave = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        firma = (clave, stat.st_size, stat.st_mtime_ns)
+        entrada = indice.get(clave)
+        if entrada and (entrada['size'], entrada['mtime_ns']) == firma[1:]:
+            return entrada['hash'], firma
+        if firma not in self._hash_memo:
+            h = hashlib.blake2b(digest_size=16)
+            with open(file_path, 'rb') as f:
+                for bloque in iter(lambda: f.read(1 << 20), b''):
+                    h.update(bloque)
+            self._hash_memo[firma] = h.hexdigest()
+        return self._hash_memo[firma], firma
+    
+    def _read_index(self, ruta_indice):
+        try:
+            with open(ruta_indice, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_json(self, ruta, datos):
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f)
+        os.replace(temporal, ruta)
+    
+    def _load_cached(self, file_path):
+        # Devuelve el DataFrame limpio guardado, o None si no hay caché válida
+        directorio, ruta_indice = self._cache_paths(file_path)
+        if not os.path.isdir(directorio):
+            return None
+        indice = self._read_index(ruta_indice)
+        digest, (clave, size, mtime_ns) = self._content_hash(file_path, indice)
+        try:
+            with open(os.path.join(directorio, digest + '.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != self.CACHE_VERSION:
+                return None
+            ruta_datos = os.path.join(directorio, meta['archivo'])
+            if meta['formato'] == 'feather':
+                data = pd.read_feather(ruta_datos)
+            else:
+                data = pd.read_pickle(ruta_datos)
+        except (OSError, ValueError, KeyError, ImportError):
+            return None
+        
+        self.encoding = meta['encoding']
+        self._cache_base = os.path.join(directorio, digest)
+        if indice.get(clave) != {'size': size, 'mtime_ns': mtime_ns, 'hash': digest}:
+            indice[clave] = {'size': size, 'mtime_ns': mtime_ns, 'hash': digest}
+            self._write_json(ruta_indice, indice)
+        return data
+    
+    def _store_cache(self, file_path):
+        # Guarda las columnas limpias en Feather (si pyarrow está instalado) o pickle
+        directorio, ruta_indice = self._cache_paths(file_path)
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            indice = self._read_index(ruta_indice)
+            digest, (clave, size, mtime_ns) = self._content_hash(file_path, indice)
+            base = os.path.join(directorio, digest)
+            try:
+                self.data.to_feather(base + '.feather.tmp')
+                formato, archivo = 'feather', digest + '.feather'
+            except ImportError:
+                self.data.to_pickle(base + '.pkl.tmp')
+                formato, archivo = 'pickle', digest + '.pkl'
+            os.replace(os.path.join(directorio, archivo + '.tmp'), os.path.join(directorio, archivo))
+            self._write_json(base + '.json', {
+                'version': self.CACHE_VERSION, 'encoding': self.encoding,
+                'formato': formato, 'archivo': archivo, 'filas': len(self.data)
+            })
+            indice[clave] = {'size': size, 'mtime_ns': mtime_ns, 'hash': digest}
+            self._write_json(ruta_indice, indice)
+            self._cache_base = base
+        except OSError as e:
+            # Sin caché la carga sigue funcionando, solo que sin camino rápido
+            print(f"No se pudo guardar la caché de datos: {e}")
+    
     def _detect_encoding(self, file_path):
        # Detecta la codificación del archivo
         with open(file_path, 'rb') as f:
@@ -32,39 +175,107 @@ class DataManager:
             self.encoding = chardet.detect(rawdata)['encoding']
     
     def _read_csv_with_encoding(self, file_path):
-        # Lee el archivo CSV con la codificación detectada
-        try:
-            return pd.read_csv(file_path, encoding=self.encoding)
-        except UnicodeDecodeError:
-            for enc in ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']:
-                try:
-                    data = pd.read_csv(file_path, encoding=enc)
-                    self.encoding = enc
-                    print(f"Usando codificación alternativa: {enc}")
-                    return data
-                except:
-                    continue
-            raise ValueError("No se pudo determinar la codificación del archivo")
+        # Lee el archivo CSV con la codificación detectada. Los bytes se leen una sola vez
+        # y las codificaciones alternativas se prueban al decodificar, así se parsea una vez
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        for enc in [self.encoding, 'utf-8', 'latin1', 'iso-8859-1', 'cp1252']:
+            if enc is None:
+                continue
+            try:
+                texto = raw.decode(enc)
+            except (UnicodeDecodeError, LookupError):
+                continue
+            if enc != self.encoding:
+                self.encoding = enc
+                print(f"Usando codificación alternativa: {enc}")
+            return pd.read_csv(io.StringIO(texto))
+        raise ValueError("No se pudo determinar la codificación del archivo")
+    
+    def iter_chunks(self, file_path, chunksize=50000, progress=None):
+        # Lee el CSV por bloques ya procesados, sin cargarlo entero en memoria.
+        # progress(filas, bytes_leidos, bytes_totales) se llama después de cada bloque
+        self._detect_encoding(file_path)
+        total = os.path.getsize(file_path)
+        filas = 0
+        with open(file_path, 'rb') as f:
+            # Sin segundo intento con otra codificación: los bytes inválidos se reemplazan
+            lector = pd.read_csv(f, encoding=self.encoding, encoding_errors='replace', chunksize=chunksize)
+            for chunk in lector:
+                chunk = self._clean_frame(chunk)
+                filas += len(chunk)
+                if progress is not None:
+                    progress(filas, f.tell(), total)
+                yield chunk
     
     def _process_data(self):
         # Preprocesa los datos para el análisis
-        if len(self.data.columns) >= 2:
-            # Tomar las dos primeras columnas y renombrar
-            self.data = self.data.iloc[:, :2]
-            self.data.columns = ['etiqueta', 'texto']
-            
-            # Limpiar y convertir etiquetas
-            self.data['etiqueta'] = self.data['etiqueta'].astype(str).str.strip().str.lower()
-            self.data['spam'] = self.data['etiqueta'].apply(lambda x: 1 if x == 'spam' else 0)
-            
-            # Eliminar valores nulos
-            self.data = self.data.dropna()
-            
-            # Validar que existan ambas clases
-            if self.data['spam'].nunique() < 2:
-                raise ValueError("El dataset debe contener ambas clases (spam y no spam)")
-        else:
+        # Índice 0..n-1 tras eliminar nulos, igual que al leer de la caché
+        self.data = self._clean_frame(self.data).reset_index(drop=True)
+        
+        # Validar que existan ambas clases
+        if self.data['spam'].nunique() < 2:
+            raise ValueError("El dataset debe contener ambas clases (spam y no spam)")
+    
+    def _deduplicate(self):
+        # Colapsa los mensajes repetidos en una fila con la columna peso (nº de copias) y
+        # grupo (para que las particiones de evaluación no separen copias). La caché guarda
+        # los datos sin colapsar y, aparte, los códigos de grupo de cada configuración, así
+        # que una carga desde caché no repite MinHash/LSH y cambiar el umbral no reprocesa el CSV
+        self.original_count = len(self.data)
+        if not self.deduplicate:
+            return
+        with etapa(self.perfilador, "Eliminación de duplicados"):
+            grupos = self._load_groups()
+            if grupos is None:
+                grupos = agrupar_duplicados(self.data['texto'], similares=self.near_duplicates,
+                                            umbral=self.similarity_threshold)
+                self._store_groups(grupos)
+            self.data = colapsar(self.data, grupos)
+    
+    def _groups_path(self):
+        # Un archivo por contenido del CSV y configuración de la deduplicación
+        if self._cache_base is None:
+            return None
+        tipo = f"similares{self.similarity_threshold:g}" if self.near_duplicates else "exactos"
+        return f"{self._cache_base}.grupos{self.CACHE_VERSION}_{tipo}.npy"
+    
+    def _load_groups(self):
+        ruta = self._groups_path()
+        if ruta is None or not os.path.exists(ruta):
+            return None
+        try:
+            grupos = np.load(ruta, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        return grupos if len(grupos) == len(self.data) else None
+    
+    def _store_groups(self, grupos):
+        ruta = self._groups_path()
+        if ruta is None:
+            return
+        try:
+            with open(ruta + '.tmp', 'wb') as f:
+                np.save(f, np.asarray(grupos, dtype=np.int64), allow_pickle=False)
+            os.replace(ruta + '.tmp', ruta)
+        except OSError as e:
+            print(f"No se pudo guardar la caché de duplicados: {e}")
+    
+    def _clean_frame(self, frame):
+        # Deja las columnas etiqueta, texto y spam de un DataFrame (completo o un bloque)
+        if len(frame.columns) < 2:
             raise ValueError("El archivo debe contener al menos 2 columnas")
+        
+        # Tomar las dos primeras columnas y renombrar
+        frame = frame.iloc[:, :2].copy()
+        frame.columns = ['etiqueta', 'texto']
+        
+        # Limpiar y convertir etiquetas
+        frame['etiqueta'] = frame['etiqueta'].astype(str).str.strip().str.lower()
+        frame['spam'] = (frame['etiqueta'] == 'spam').astype(int)
+        
+        # Eliminar valores nulos
+        return frame.dropna()
     
     def get_dataset_info(self):
         # Retorna información básica del dataset
@@ -72,10 +283,14 @@ class DataManager:
             return "No hay datos cargados"
         
         stats = self.get_data_stats()
+        duplicates = ""
+        if 'peso' in self.data.columns:
+            duplicates = (f"\nMensajes únicos: {stats['unique_records']} "
+                          f"({stats['total_records'] - stats['unique_records']} duplicados colapsados)")
         
         info = f"""INFORMACIÓN DEL DATASET
 ----------------------------
-Total de registros: {stats['total_records']}
+Total de registros: {stats['total_records']}{duplicates}
 Mensajes spam: {stats['spam_count']} ({stats['spam_ratio']:.1%})
 Mensajes no spam: {stats['ham_count']} ({stats['ham_ratio']:.1%})
 
@@ -89,16 +304,21 @@ Primeras 5 filas:
         if self.data is None:
             return None
         
+        # Con duplicados colapsados cada fila cuenta tantas veces como su peso
+        peso = self.data['peso'] if 'peso' in self.data.columns else pd.Series(1, index=self.data.index)
+        total = int(peso.sum())
+        spam_count = int(peso[self.data['spam'] == 1].sum())
         return {
-            'total_records': len(self.data),
-            'spam_count': self.data['spam'].sum(),
-            'ham_count': len(self.data) - self.data['spam'].sum(),
-            'spam_ratio': self.data['spam'].mean(),
-            'ham_ratio': 1 - self.data['spam'].mean()
+            'total_records': total,
+            'unique_records': len(self.data),
+            'spam_count': spam_count,
+            'ham_count': total - spam_count,
+            'spam_ratio': spam_count / total,
+            'ham_ratio': 1 - spam_count / total
         }
     
     def get_data_for_training(self):
         # Retorna los datos preprocesados para entrenamiento
         if self.data is None:
             raise ValueError("No hay datos cargados para entrenamiento")
-        return self.data
\ No newline at end of file
+        return self.data
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Detección de mensajes duplicados para colapsar el dataset en filas con peso.
+
+Los duplicados exactos (tras pasar a minúsculas y normalizar espacios) se agrupan por
+hash del contenido. Los casi duplicados (p. ej. la misma plantilla de spam con otro
+número de teléfono) se encuentran con firmas MinHash sobre n-gramas de caracteres y
+LSH por bandas: solo se comparan los pares que coinciden en alguna banda, y se unen
+los que tienen una similitud de Jaccard estimada mayor o igual al umbral.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+# Multiplicador del hash polinomial de los n-gramas (primo de FNV) y de la mezcla final (splitmix64)
+_BASE = np.uint64(0x100000001B3)
+_MEZCLA = np.uint64(0xBF58476D1CE4E5B9)
+
+
+def normalizar(textos):
+    """Minúsculas y espacios colapsados; dos textos iguales tras esto son duplicados exactos"""
+    return pd.Series(textos, dtype=object).astype(str).str.lower().str.split().str.join(' ')
+
+
+def grupos_exactos(textos):
+    """Código de grupo por texto (0..k-1, en orden de primera aparición) según el hash del contenido"""
+    hashes = pd.util.hash_pandas_object(normalizar(textos), index=False).to_numpy()
+    codigos, _ = pd.factorize(hashes)
+    return codigos
+
+
+def firmas_minhash(textos, num_permutaciones=64, n=5, semilla=1):
+    """
+    Matriz (textos x num_permutaciones) con el mínimo de cada función hash sobre los
+    n-gramas de caracteres de cada texto. Los textos se procesan juntos en un solo buffer
+    para no iterar n-grama por n-grama en Python.
+    """
+    codificados = [texto.encode('utf-8') for texto in normalizar(textos)]
+    if not codificados:
+        return np.zeros((0, num_permutaciones), dtype=np.uint64)
+    longitudes = np.array([len(c) for c in codificados])
+    # Cada texto va seguido de n-1 ceros: un texto más corto que n es un solo n-grama
+    relleno = b'\0' * (n - 1)
+    buffer = np.frombuffer(relleno.join(codificados) + relleno, dtype=np.uint8).astype(np.uint64)
+    inicios = np.concatenate(([0], np.cumsum(longitudes[:-1] + n - 1)))
+
+    # Posiciones de inicio de cada n-grama, agrupadas por texto
+    ventanas = np.maximum(longitudes - n + 1, 1)
+    texto_de = np.repeat(np.arange(len(codificados)), ventanas)
+    primera = np.concatenate(([0], np.cumsum(ventanas[:-1])))
+    posiciones = inicios[texto_de] + (np.arange(len(texto_de)) - primera[texto_de])
+
+    with np.errstate(over='ignore'):
+        h = np.zeros(len(posiciones), dtype=np.uint64)
+        for j in range(n):
+            h = h * _BASE + buffer[posiciones + j]
+
+        generador = np.random.default_rng(semilla)
+        a = generador.integers(1, 2 ** 63, num_permutaciones, dtype=np.uint64) | np.uint64(1)
+        b = generador.integers(0, 2 ** 63, num_permutaciones, dtype=np.uint64)
+        firmas = np.empty((len(codificados), num_permutaciones), dtype=np.uint64)
+        for i in range(num_permutaciones):
+            x = h * a[i] + b[i]
+            x = (x ^ (x >> np.uint64(31))) * _MEZCLA
+            firmas[:, i] = np.minimum.reduceat(x, primera)
+    return firmas
+
+
+def grupos_similares(firmas, umbral=0.8, bandas=16):
+    """
+    Código de grupo por fila de firmas: LSH por bandas propone candidatos y se unen (union-find)
+    los pares cuya fracción de componentes iguales, que estima el Jaccard, alcanza el umbral
+    """
+    n, num_permutaciones = firmas.shape
+    filas = num_permutaciones // bandas
+    padre = np.arange(n)
+
+    def raiz(i):
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    for banda in range(bandas):
+        trozo = np.ascontiguousarray(firmas[:, banda * filas:(banda + 1) * filas])
+        _, primero, cubeta = np.unique(trozo.view(np.dtype((np.void, trozo.dtype.itemsize * filas))).ravel(),
+                                       return_index=True, return_inverse=True)
+        # Cada miembro de una cubeta se compara con el primero que cayó en ella
+        otros = np.flatnonzero(primero[cubeta] != np.arange(n))
+        if not len(otros):
+            continue
+        pares = np.column_stack((primero[cubeta[otros]], otros))
+        similitud = (firmas[pares[:, 0]] == firmas[pares[:, 1]]).mean(axis=1)
+        for i, j in pares[similitud >= umbral]:
+            ri, rj = raiz(i), raiz(j)
+            if ri != rj:
+                padre[max(ri, rj)] = min(ri, rj)
+
+    return np.array([raiz(i) for i in range(n)])
+
+
+def agrupar_duplicados(textos, similares=True, umbral=0.8, num_permutaciones=64, bandas=16):
+    """
+    Código de grupo por texto: primero duplicados exactos y, si similares es True, casi
+    duplicados entre los textos únicos. El código es el índice del primer texto del grupo
+    """
+    codigos = grupos_exactos(textos)
+    _, primeros = np.unique(codigos, return_index=True)
+    if similares and len(primeros) > 1:
+        unicos = pd.Series(textos, dtype=object).iloc[primeros]
+        grupo_unico = grupos_similares(firmas_minhash(unicos, num_permutaciones), umbral, bandas)
+        return primeros[grupo_unico][codigos]
+    return primeros[codigos]
+
+
+def dividir_por_grupos(etiquetas, grupos, test_size=0.2, random_state=42):
+    """
+    Índices (entrenamiento, prueba) con cada grupo entero de un lado, estratificados por la
+    etiqueta de la primera fila de cada grupo. Así ninguna copia de un mensaje de prueba
+    llega al entrenamiento
+    """
+    grupos = np.asarray(grupos)
+    codigos, unicos = pd.factorize(grupos)
+    _, primeras = np.unique(codigos, return_index=True)
+    grupos_train, grupos_test = train_test_split(
+        np.arange(len(unicos)), test_size=test_size, random_state=random_state,
+        stratify=np.asarray(etiquetas)[primeras]
+    )
+    en_prueba = np.zeros(len(unicos), dtype=bool)
+    en_prueba[grupos_test] = True
+    return np.flatnonzero(~en_prueba[codigos]), np.flatnonzero(en_prueba[codigos])
+
+
+def colapsar(data, grupos):
+    """
+    Una fila por (grupo, clase) con el texto de su primera aparición y la columna peso con
+    el número de mensajes que representa. Un grupo con etiquetas distintas conserva una
+    fila por etiqueta, para no decidir entre ellas
+    """
+    data = data.assign(grupo=grupos)
+    colapsado = data.groupby(['grupo', 'spam'], sort=False).agg(
+        etiqueta=('etiqueta', 'first'),
+        texto=('texto', 'first'),
+        peso=('texto', 'size')
+    ).reset_index()
+    return colapsado[['etiqueta', 'texto', 'spam', 'peso', 'grupo']]
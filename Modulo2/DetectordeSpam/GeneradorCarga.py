@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para Servidor.py: envía solicitudes concurrentes a /predict y
+reporta la latencia p50/p95/p99 medida por el cliente y las solicitudes por segundo.
+
+    python GeneradorCarga.py --solicitudes 5000 --concurrencia 32 --datos spam.csv
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+from Servidor import percentil
+
+MENSAJES_PREDETERMINADOS = [
+    "FREE entry into our weekly draw just text WIN to 80086 now",
+    "Hi, are we still meeting for lunch tomorrow?",
+    "Congratulations! You've won a $1000 gift card. Call now to claim",
+    "Reminder: doctor's appointment at 3 PM today.",
+]
+
+
+def cargar_mensajes(ruta):
+    # Reutiliza la limpieza de DataManager para tomar los textos de un CSV
+    from DataManager import DataManager
+    data_manager = DataManager()
+    success, message = data_manager.load_data(ruta)
+    if not success:
+        raise ValueError(message)
+    return data_manager.data['texto'].tolist()
+
+
+def ejecutar_carga(url, mensajes, solicitudes, concurrencia):
+    """Reparte las solicitudes entre hilos; devuelve (latencias ordenadas, errores, segundos)"""
+    latencias = []
+    errores = [0]
+    lock = threading.Lock()
+    siguiente = [0]
+
+    def trabajador():
+        while True:
+            with lock:
+                i = siguiente[0]
+                if i >= solicitudes:
+                    return
+                siguiente[0] += 1
+            cuerpo = json.dumps({'message': mensajes[i % len(mensajes)]}).encode('utf-8')
+            peticion = urllib.request.Request(url + '/predict', data=cuerpo,
+                                              headers={'Content-Type': 'application/json'})
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+                    respuesta.read()
+                latencia = time.perf_counter() - inicio
+                with lock:
+                    latencias.append(latencia)
+            except OSError:
+                with lock:
+                    errores[0] += 1
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return sorted(latencias), errores[0], time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para el servicio de spam")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--solicitudes', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--datos', help="CSV del que tomar los mensajes (por defecto, unos de ejemplo)")
+    args = parser.parse_args()
+
+    mensajes = cargar_mensajes(args.datos) if args.datos else MENSAJES_PREDETERMINADOS
+    latencias, errores, segundos = ejecutar_carga(args.url, mensajes, args.solicitudes, args.concurrencia)
+
+    print(f"Solicitudes: {len(latencias)} correctas, {errores} con error en {segundos:.2f} s")
+    print(f"Rendimiento: {len(latencias) / segundos:.0f} solicitudes/s")
+    print(f"Latencia p50: {percentil(latencias, 50) * 1000:.2f} ms")
+    print(f"Latencia p95: {percentil(latencias, 95) * 1000:.2f} ms")
+    print(f"Latencia p99: {percentil(latencias, 99) * 1000:.2f} ms")
+    with urllib.request.urlopen(args.url + '/metrics', timeout=10) as respuesta:
+        metricas = json.loads(respuesta.read())
+    print(f"Servidor: {metricas['lotes']} lotes, {metricas['tamano_medio_lote']:.1f} mensajes por lote")
+
+
+if __name__ == "__main__":
+    main()
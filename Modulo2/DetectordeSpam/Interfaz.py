@@ -1,13 +1,23 @@
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
+from ClasificacionMasiva import clasificar_archivo, formatear_resumen
 from DataManager import DataManager
 from NaiveBayes import NaiveBayes
+from Perfilador import Perfilador
 
 class Interfaz:
     """
     Clase principal para la interfaz gráfica del detector de spam
     """
     
+    # Correcciones del usuario acumuladas antes de guardar el modelo, e intervalo del
+    # guardado periódico (ms)
+    FEEDBACK_AUTOSAVE = 20
+    AUTOSAVE_INTERVAL = 60000
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Detector de Spam - Naive Bayes")
@@ -18,7 +28,26 @@ class Interfaz:
         self.data_manager = DataManager()
         self.model = NaiveBayes()
         
+        # Trabajo en segundo plano: el hilo publica eventos en la cola y la ventana
+        # los consulta con after(); los botones de esta lista se desactivan mientras tanto
+        self._busy_buttons = []
+        self._worker = None
+        self._events = queue.Queue()
+        self._cancel_event = threading.Event()
+        
+        # Archivo del modelo (al guardarlo o cargarlo) y correcciones aún sin guardar
+        self.model_path = None
+        self._pending_feedback = 0
+        
+        # Perfil por etapas de la última carga y del último entrenamiento. Solo tiempos por
+        # defecto: medir la memoria (tracemalloc) hace varias veces más lentas las etapas
+        self.profile_memory = tk.BooleanVar(value=False)
+        self._load_profile = Perfilador(memoria=False)
+        self.profile = self._load_profile
+        self._profile_context = {}
+        
         self.setup_ui()
+        self.root.after(self.AUTOSAVE_INTERVAL, self._autosave_tick)
     
     def setup_ui(self):
         """Configura la interfaz de usuario"""
@@ -59,8 +88,11 @@ class Interfaz:
         file_entry = ttk.Entry(file_frame, textvariable=self.file_path, width=50)
         file_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
         
-        ttk.Button(file_frame, text="Examinar", command=self._browse_file).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(file_frame, text="Cargar Datos", command=self._load_data).pack(side=tk.LEFT)
+        browse_button = ttk.Button(file_frame, text="Examinar", command=self._browse_file)
+        browse_button.pack(side=tk.LEFT, padx=(0, 10))
+        load_button = ttk.Button(file_frame, text="Cargar Datos", command=self._load_data)
+        load_button.pack(side=tk.LEFT)
+        self._busy_buttons += [browse_button, load_button]
         
         self.data_status = ttk.Label(data_frame, text="No se han cargado datos", foreground="red")
         self.data_status.pack(anchor=tk.W, pady=(5, 0))
@@ -73,11 +105,26 @@ class Interfaz:
         train_buttons = ttk.Frame(train_frame)
         train_buttons.pack(fill=tk.X)
         
-        ttk.Button(train_buttons, text="Entrenar Modelo Naive Bayes", 
-                  command=self._train_model).pack(side=tk.LEFT)
+        train_button = ttk.Button(train_buttons, text="Entrenar Modelo Naive Bayes", 
+                                  command=self._train_model)
+        train_button.pack(side=tk.LEFT)
+        save_button = ttk.Button(train_buttons, text="Guardar Modelo", 
+                                 command=self._save_model)
+        save_button.pack(side=tk.LEFT, padx=(10, 0))
+        load_model_button = ttk.Button(train_buttons, text="Cargar Modelo", 
+                                       command=self._load_model)
+        load_model_button.pack(side=tk.LEFT, padx=(10, 0))
+        self.cancel_button = ttk.Button(train_buttons, text="Cancelar", 
+                                        command=self._cancel_work, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(10, 0))
+        self._busy_buttons += [train_button, save_button, load_model_button]
         
         self.train_status = ttk.Label(train_buttons, text="Modelo no entrenado")
         self.train_status.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Etapa en curso y tiempos de las etapas terminadas
+        self.progress_label = ttk.Label(train_frame, text="", foreground="gray")
+        self.progress_label.pack(anchor=tk.W, pady=(5, 0))
     
     def _create_testing_section(self, parent):
         """Crea la sección de prueba de mensajes"""
@@ -92,11 +139,31 @@ class Interfaz:
         test_buttons = ttk.Frame(test_frame)
         test_buttons.pack(fill=tk.X)
         
-        ttk.Button(test_buttons, text="Clasificar Mensaje", 
-                  command=self._classify_message).pack(side=tk.LEFT)
+        classify_button = ttk.Button(test_buttons, text="Clasificar Mensaje", 
+                                     command=self._classify_message)
+        classify_button.pack(side=tk.LEFT)
+        classify_file_button = ttk.Button(test_buttons, text="Clasificar Archivo...", 
+                                          command=self._classify_file)
+        classify_file_button.pack(side=tk.LEFT, padx=(10, 0))
+        self._busy_buttons += [classify_button, classify_file_button]
         
         self.result_label = ttk.Label(test_buttons, text="", font=('Arial', 12, 'bold'))
         self.result_label.pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Correcciones: el modelo aprende del mensaje sin reentrenar
+        feedback_buttons = ttk.Frame(test_frame)
+        feedback_buttons.pack(fill=tk.X, pady=(10, 0))
+        
+        mark_spam_button = ttk.Button(feedback_buttons, text="Marcar como Spam", 
+                                      command=lambda: self._mark_message(True))
+        mark_spam_button.pack(side=tk.LEFT)
+        mark_ham_button = ttk.Button(feedback_buttons, text="Marcar como No Spam", 
+                                     command=lambda: self._mark_message(False))
+        mark_ham_button.pack(side=tk.LEFT, padx=(10, 0))
+        self._busy_buttons += [mark_spam_button, mark_ham_button]
+        
+        self.feedback_status = ttk.Label(feedback_buttons, text="", foreground="gray")
+        self.feedback_status.pack(side=tk.LEFT, padx=(20, 0))
     
     def _create_metrics_section(self, parent):
         """Crea la sección de métricas (sin gráficas)"""
@@ -107,6 +174,16 @@ class Interfaz:
         
         self.metrics_text = scrolledtext.ScrolledText(metrics_frame, height=8)
         self.metrics_text.pack(fill=tk.X, pady=(5, 0))
+        
+        profile_buttons = ttk.Frame(metrics_frame)
+        profile_buttons.pack(fill=tk.X, pady=(5, 0))
+        
+        export_button = ttk.Button(profile_buttons, text="Exportar Perfil...", 
+                                   command=self._export_profile)
+        export_button.pack(side=tk.RIGHT)
+        memory_check = ttk.Checkbutton(profile_buttons, text="Medir memoria en el perfil (más lento)", 
+                                       variable=self.profile_memory)
+        memory_check.pack(side=tk.RIGHT, padx=(0, 10))
     
     def _create_info_section(self, parent):
         """Crea la sección de información del dataset"""
@@ -126,21 +203,45 @@ class Interfaz:
             self.file_path.set(filename)
     
     def _load_data(self):
-        """Maneja la carga de datos"""
+        """Maneja la carga de datos (en segundo plano)"""
         file_path = self.file_path.get()
         if not file_path:
             messagebox.showerror("Error", "Por favor ingresa una ruta de archivo")
             return
         
-        success, message = self.data_manager.load_data(file_path)
+        # Se carga en un DataManager nuevo; el actual se reemplaza solo si todo sale bien
+        data_manager = DataManager()
+        data_manager.perfilador = profiler = Perfilador(memoria=self.profile_memory.get())
         
-        if success:
-            self.data_status.config(text=f"Datos cargados: {len(self.data_manager.data)} registros", 
+        def on_done(results):
+            data_manager.perfilador = None
+            self.data_manager = data_manager
+            self._load_profile = self.profile = profiler
+            self._profile_context = {'archivo': file_path, 'filas': data_manager.original_count,
+                                     'filas_unicas': len(data_manager.data)}
+            self.data_status.config(text=f"Datos cargados: {data_manager.original_count} registros "
+                                         f"({len(data_manager.data)} únicos)", 
                                   foreground="green")
             self._show_dataset_info()
-        else:
+        
+        def on_error(message):
             messagebox.showerror("Error", message)
             self.data_status.config(text="Error al cargar datos", foreground="red")
+        
+        previous_status = (self.data_status.cget("text"), self.data_status.cget("foreground"))
+        
+        def on_cancel():
+            self.data_status.config(text=previous_status[0], foreground=previous_status[1])
+        
+        def load():
+            # La carga revisa la cancelación entre sus pasos; al cancelar, el hilo la reporta como tal
+            success, message = data_manager.load_data(file_path, cancel_event=self._cancel_event)
+            if success or self._cancel_event.is_set():
+                return message
+            raise RuntimeError(message)
+        
+        self.data_status.config(text="Cargando datos...", foreground="black")
+        self._run_in_background([("Cargando datos", load)], on_done, on_error, on_cancel)
     
     def _show_dataset_info(self):
         """Muestra información del dataset en la interfaz"""
@@ -149,30 +250,196 @@ class Interfaz:
         self.info_text.insert(1.0, info)
     
     def _train_model(self):
-        """Maneja el entrenamiento del modelo"""
+        """Maneja el entrenamiento y la evaluación del modelo (en segundo plano)"""
         if self.data_manager.data is None:
             messagebox.showerror("Error", "Primero debe cargar los datos")
             return
         
-        try:
-            self.train_status.config(text="Entrenando modelo...")
-            self.root.update()
-            
-            # Entrenar modelo
-            success, message = self.model.train(self.data_manager.data)
-            
-            if success:
-                # Evaluar modelo
-                evaluation_results = self.model.evaluate_model(self.data_manager.data)
-                self._show_metrics(evaluation_results)
-                self.train_status.config(text="Modelo entrenado exitosamente")
+        # Se entrena un modelo nuevo; si se cancela, el anterior sigue disponible
+        data = self.data_manager.data
+        model = NaiveBayes()
+        # El perfil del entrenamiento continúa el de la carga de estos datos
+        model.perfilador = profiler = Perfilador(memoria=self.profile_memory.get(),
+                                                 etapas=self._load_profile.etapas)
+        
+        def on_done(results):
+            model.perfilador = None
+            self.model = model
+            self.profile = profiler
+            self._profile_context['vocabulario'] = len(model.P_caracteristicas_spam)
+            self.model_path = None
+            self._pending_feedback = 0
+            self._show_metrics(results[1])
+            self.train_status.config(text="Modelo entrenado exitosamente")
+        
+        def on_error(message):
+            messagebox.showerror("Error", message)
+            self.train_status.config(text="Error en el entrenamiento")
+        
+        def on_cancel():
+            self.train_status.config(text="Entrenamiento cancelado")
+        
+        self.train_status.config(text="Entrenando modelo...")
+        self._run_in_background([
+            ("Entrenando modelo", lambda: self._check_success(model.train(data))),
+            ("Evaluando modelo", lambda: model.evaluate_model(data))
+        ], on_done, on_error, on_cancel)
+    
+    def _check_success(self, result):
+        """Convierte un (success, message) fallido en excepción dentro del hilo de trabajo"""
+        success, message = result
+        if not success:
+            raise RuntimeError(message)
+        return message
+    
+    def _run_in_background(self, stages, on_done, on_error, on_cancel):
+        """
+        Ejecuta las etapas (nombre, función) en orden en un hilo de trabajo.
+        Al terminar llama on_done(resultados), on_error(mensaje) u on_cancel() en el
+        hilo de Tk. La cancelación se atiende entre etapas (y dentro de las que reciben
+        self._cancel_event) y descarta los resultados.
+        """
+        self._cancel_event.clear()
+        self._events = queue.Queue()
+        self._stage_times = []
+        self._current_stage = None
+        self._stage_detail = ""
+        self._on_done, self._on_error, self._on_cancel = on_done, on_error, on_cancel
+        for button in self._busy_buttons:
+            button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        
+        self._worker = threading.Thread(target=self._worker_loop, args=(stages, self._events), daemon=True)
+        self._worker.start()
+        self.root.after(100, self._poll_worker)
+    
+    def _worker_loop(self, stages, events):
+        # No toca widgets: solo publica eventos en la cola
+        results = []
+        for name, function in stages:
+            if self._cancel_event.is_set():
+                events.put(('cancelled', None))
+                return
+            start = time.perf_counter()
+            events.put(('stage', (name, start)))
+            try:
+                results.append(function())
+            except Exception as e:
+                events.put(('error', str(e)))
+                return
+            events.put(('stage_done', (name, time.perf_counter() - start)))
+        events.put(('cancelled' if self._cancel_event.is_set() else 'done', results))
+    
+    def _poll_worker(self):
+        """Consulta los eventos del hilo de trabajo y actualiza la etapa y los tiempos"""
+        finished = None
+        while True:
+            try:
+                kind, value = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'stage':
+                self._current_stage = value
+            elif kind == 'stage_done':
+                self._current_stage = None
+                self._stage_detail = ""
+                self._stage_times.append(value)
+            elif kind == 'detail':
+                self._stage_detail = value
             else:
-                messagebox.showerror("Error", message)
-                self.train_status.config(text="Error en el entrenamiento")
-                
+                finished = (kind, value)
+        
+        parts = [f"{name}: {seconds:.2f} s ✓" for name, seconds in self._stage_times]
+        if self._current_stage is not None:
+            name, start = self._current_stage
+            detail = f" ({self._stage_detail})" if self._stage_detail else ""
+            parts.append(f"{name}... {time.perf_counter() - start:.1f} s{detail}")
+        if self._cancel_event.is_set() and finished is None:
+            parts.append("cancelando al terminar la etapa actual")
+        self.progress_label.config(text="  |  ".join(parts))
+        
+        if finished is None:
+            self.root.after(100, self._poll_worker)
+            return
+        
+        self._worker = None
+        for button in self._busy_buttons:
+            button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        kind, value = finished
+        if kind == 'done':
+            self._on_done(value)
+        elif kind == 'error':
+            self._on_error(value)
+        else:
+            self.progress_label.config(text="  |  ".join(parts + ["Cancelado"]))
+            self._on_cancel()
+    
+    def _post_detail(self, text):
+        """Desde el hilo de trabajo: detalle del avance de la etapa en curso"""
+        self._events.put(('detail', text))
+    
+    def _cancel_work(self):
+        """Pide detener el trabajo en curso antes de la siguiente etapa"""
+        if self._worker is not None:
+            self._cancel_event.set()
+    
+    def _save_model(self):
+        """Guarda el modelo entrenado para no reentrenar en la próxima sesión"""
+        if not self.model.is_trained:
+            messagebox.showerror("Error", "Primero debe entrenar el modelo")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Guardar modelo",
+            initialfile="modelo_spam.nbm",
+            defaultextension=".nbm",
+            filetypes=[("Modelo Naive Bayes", "*.nbm"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            self.model.save(filename)
+            self.model_path = filename
+            self._pending_feedback = 0
+            self.train_status.config(text=f"Modelo guardado en {filename}")
         except Exception as e:
-            messagebox.showerror("Error", f"Error en el entrenamiento: {str(e)}")
-            self.train_status.config(text="Error en el entrenamiento")
+            messagebox.showerror("Error", f"Error al guardar el modelo: {str(e)}")
+    
+    def _load_model(self):
+        """Carga un modelo guardado; permite clasificar sin cargar datos ni entrenar"""
+        filename = filedialog.askopenfilename(
+            title="Cargar modelo",
+            filetypes=[("Modelo Naive Bayes", "*.nbm"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            self.model = NaiveBayes.load(filename)
+            self.model_path = filename
+            self._pending_feedback = 0
+            self.train_status.config(text=f"Modelo cargado desde {filename}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar el modelo: {str(e)}")
+    
+    def _export_profile(self):
+        """Exporta a JSON el perfil por etapas de la última carga y entrenamiento"""
+        if not self.profile.etapas:
+            messagebox.showerror("Error", "Primero debe cargar los datos o entrenar el modelo")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            title="Exportar perfil",
+            initialfile="perfil.json",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            self.profile.exportar(filename, **self._profile_context)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al exportar el perfil: {str(e)}")
     
     def _show_metrics(self, evaluation_results):
         """Muestra las métricas en la interfaz (sin gráficas)"""
@@ -200,10 +467,57 @@ RESUMEN:
 --------
 El modelo manual tiene una exactitud del {manual_metrics['accuracy']:.2%}
 comparado con {sklearn_metrics['accuracy']:.2%} de Scikit-learn.
+
+PERFIL POR ETAPA:
+-----------------
+{self.profile.reporte()}
 """
         self.metrics_text.delete(1.0, tk.END)
         self.metrics_text.insert(1.0, metrics_text)
     
+    def _classify_file(self):
+        """Clasifica todos los mensajes de un archivo y escribe los resultados en un CSV"""
+        if not self.model.is_trained:
+            messagebox.showerror("Error", "Primero debe entrenar el modelo")
+            return
+        
+        input_path = filedialog.askopenfilename(
+            title="Archivo de mensajes a clasificar",
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not input_path:
+            return
+        output_path = filedialog.asksaveasfilename(
+            title="Guardar resultados",
+            initialfile="resultados.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not output_path:
+            return
+        
+        model = self.model
+        
+        def classify():
+            return clasificar_archivo(
+                model, input_path, output_path, cancel_event=self._cancel_event,
+                progress=lambda partial: self._post_detail(
+                    f"{partial['total']} mensajes, {partial['mensajes_por_segundo']:.0f} mensajes/s")
+            )
+        
+        def on_done(results):
+            summary = formatear_resumen(results[0])
+            self.result_label.config(text="Archivo clasificado", foreground="black")
+            messagebox.showinfo("Clasificación de archivo", f"{summary}\n\nResultados en {output_path}")
+        
+        def on_error(message):
+            messagebox.showerror("Error", f"Error al clasificar el archivo: {message}")
+        
+        def on_cancel():
+            self.result_label.config(text="Clasificación cancelada (resultados parciales)", foreground="black")
+        
+        self._run_in_background([("Clasificando archivo", classify)], on_done, on_error, on_cancel)
+    
     def _classify_message(self):
         """Clasifica un mensaje ingresado por el usuario"""
         if not self.model.is_trained:
@@ -240,4 +554,49 @@ El mensaje ha sido clasificado como LEGÍTIMO con una probabilidad del {result['
             messagebox.showinfo("Resultado de Clasificación", result_text)
             
         except Exception as e:
-            messagebox.showerror("Error", f"Error al clasificar mensaje: {str(e)}")
\ No newline at end of file
+            messagebox.showerror("Error", f"Error al clasificar mensaje: {str(e)}")
+    
+    def _mark_message(self, is_spam):
+        """Corrige la clasificación del mensaje actual y actualiza el modelo al momento"""
+        if not self.model.is_trained:
+            messagebox.showerror("Error", "Primero debe entrenar el modelo")
+            return
+        
+        message = self.message_text.get(1.0, tk.END).strip()
+        if not message:
+            messagebox.showwarning("Advertencia", "Por favor ingresa un mensaje para marcar")
+            return
+        
+        try:
+            self.model.update([message], [int(is_spam)])
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al actualizar el modelo: {str(e)}")
+            return
+        
+        self._pending_feedback += 1
+        label = "spam" if is_spam else "no spam"
+        self.feedback_status.config(text=f"Mensaje aprendido como {label} ({self._pending_feedback} sin guardar)")
+        if self._pending_feedback >= self.FEEDBACK_AUTOSAVE:
+            self._autosave()
+    
+    def _autosave_tick(self):
+        """Guardado periódico de las correcciones pendientes"""
+        self._autosave()
+        self.root.after(self.AUTOSAVE_INTERVAL, self._autosave_tick)
+    
+    def _autosave(self):
+        """Guarda el modelo en su archivo si hay correcciones pendientes y no hay trabajo en curso"""
+        if not self._pending_feedback or self._worker is not None:
+            return
+        if self.model_path is None:
+            self.feedback_status.config(
+                text=f"{self._pending_feedback} correcciones sin guardar: use Guardar Modelo")
+            return
+        try:
+            self.model.save(self.model_path)
+        except Exception as e:
+            self.feedback_status.config(text=f"Error al guardar las correcciones: {str(e)}")
+            return
+        self.feedback_status.config(
+            text=f"{self._pending_feedback} correcciones guardadas en {self.model_path}")
+        self._pending_feedback = 0
@@ -1,95 +1,427 @@
+import json
+import mmap
+import os
+import struct
+import zlib
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from Duplicados import dividir_por_grupos
+from VectorizacionParalela import vectorizar_paralelo
+from Perfilador import etapa
 
 class NaiveBayes:
-   
+    # Archivo de modelo: cabecera de 24 bytes y secciones alineadas a 8 bytes:
+    # log-previas (2 float64), log-verosimilitudes (n x 2 float64), idf (n float64, solo
+    # TF-IDF), conteos para seguir aprendiendo (alpha, mensajes por clase y 2 x n float64,
+    # opcional) y el vocabulario en UTF-8 separado por saltos de línea (solo TF-IDF)
+    MAGIA = b"NBSM"
+    VERSION = 3
+    # magia, versión, vectorizador, nº características, bytes del vocabulario, crc32,
+    # n-grama mínimo y máximo, si incluye conteos
+    CABECERA = struct.Struct("<4sHHIIIBBBx")
+    VECTORIZADOR_TFIDF = 0
+    VECTORIZADOR_HASHING = 1
     
-    def __init__(self):
+    def __init__(self, max_features=5000, ngram_range=(1, 1), alpha=0.0, n_jobs=1):
+        # Hiperparámetros: tamaño del vocabulario TF-IDF, n-gramas y suavizado aditivo
+        # (con alpha=0 solo se recortan las probabilidades a 1e-10). Con n_jobs != 1 la
+        # tokenización de train se reparte en procesos (None = uno por núcleo)
+        self.max_features = max_features
+        self.ngram_range = tuple(ngram_range)
+        self.alpha = alpha
+        self.n_jobs = n_jobs
         self.vectorizer = None
         self.P_spam = 0
         self.P_ham = 0
         self.P_caracteristicas_spam = None
         self.P_caracteristicas_ham = None
-        self.features_array = None
+        # Pesos precalculados para puntuar: columnas [ham, spam]
+        self.log_caracteristicas = None
+        self.log_previas = None
+        # Corrección por clase que update aplica en lugar de renormalizar todo el vocabulario
+        self.log_normalizacion = np.zeros(2)
+        # Sumas de características y número de mensajes por clase (filas: ham, spam)
+        self.conteos_clase = None
+        self.documentos_clase = None
+        self._totales_referencia = None
+        self._totales_clase = None
+        self.features = None  # matriz CSR dispersa (mensajes x vocabulario)
         self.sklearn_model = None
         self.is_trained = False
+        # Perfilador opcional que mide las etapas de train y evaluate_model
+        self.perfilador = None
+        # Archivo mapeado del que load leyó los pesos (ruta, mmap), o None
+        self._mapa = None
     
     def train(self, data):
         # Entrena el modelo Naive Bayes manualmente
         try:
-            # Preparar características con TF-IDF
-            self.vectorizer = TfidfVectorizer(stop_words='english', max_features=5000)
-            features = self.vectorizer.fit_transform(data["texto"])
-            self.features_array = features.toarray()
+            with etapa(self.perfilador, "Entrenamiento"):
+                # Preparar características con TF-IDF
+                with etapa(self.perfilador, "Ajuste TF-IDF"):
+                    if self.n_jobs == 1:
+                        self.vectorizer = TfidfVectorizer(stop_words='english', max_features=self.max_features,
+                                                          ngram_range=self.ngram_range)
+                        # Se conserva dispersa: la memoria crece con los valores no nulos, no con filas x vocabulario
+                        self.features = self.vectorizer.fit_transform(data["texto"]).tocsr()
+                    else:
+                        # Misma matriz, con la tokenización repartida en un pool de procesos
+                        self.vectorizer, self.features = vectorizar_paralelo(
+                            data["texto"], self.max_features, self.ngram_range, procesos=self.n_jobs)
+                
+                with etapa(self.perfilador, "Probabilidades por clase"):
+                    self._reiniciar_conteos(self.features.shape[1])
+                    self._acumular(self.features, data["spam"].to_numpy(), self._pesos(data))
+                    self._actualizar_probabilidades()
             
-            # Calcular probabilidades previas
-            self.P_spam = data["spam"].sum() / len(data)
-            self.P_ham = 1 - self.P_spam
+            self.is_trained = True
+            return True, "Modelo entrenado exitosamente"
             
-            # Calcular probabilidades condicionales
-            P_caracteristicas_spam = self.features_array[data["spam"] == 1].sum(axis=0) / self.features_array[data["spam"] == 1].sum()
-            P_caracteristicas_ham = self.features_array[data["spam"] == 0].sum(axis=0) / self.features_array[data["spam"] == 0].sum()
+        except Exception as e:
+            self.is_trained = False
+            return False, f"Error en el entrenamiento: {str(e)}"
+    
+    def train_streaming(self, chunks, n_features=2 ** 18):
+        # Entrena bloque a bloque con memoria acotada: el vectorizador de hashing no
+        # necesita ver todo el corpus y los conteos por clase se acumulan como en
+        # MultinomialNB.partial_fit. chunks es un iterable de DataFrames con texto y spam
+        try:
+            self.vectorizer = HashingVectorizer(stop_words='english', n_features=n_features, alternate_sign=False,
+                                                ngram_range=self.ngram_range)
+            self.features = None  # no se conserva la matriz completa
+            self._reiniciar_conteos(n_features)
+            for chunk in chunks:
+                self.partial_fit(chunk["texto"], chunk["spam"])
             
-            # Evitar problemas numéricos
-            self.P_caracteristicas_spam = np.clip(P_caracteristicas_spam, 1e-10, 1)
-            self.P_caracteristicas_ham = np.clip(P_caracteristicas_ham, 1e-10, 1)
+            if self.documentos_clase.min() == 0:
+                raise ValueError("El dataset debe contener ambas clases (spam y no spam)")
+            self._actualizar_probabilidades()
             
             self.is_trained = True
-            return True, "Modelo entrenado exitosamente"
+            return True, "Modelo entrenado por bloques exitosamente"
             
         except Exception as e:
             self.is_trained = False
             return False, f"Error en el entrenamiento: {str(e)}"
     
-    def predict(self, message):
-        # Realiza una predicción para un mensaje dado
+    def partial_fit(self, textos, etiquetas):
+        # Suma un bloque de mensajes a los conteos; las probabilidades se recalculan aparte
+        if self.conteos_clase is None:
+            raise ValueError("Los conteos no están inicializados; usa train o train_streaming")
+        X = self.vectorizer.transform(textos)
+        self._acumular(X, np.asarray(etiquetas))
+    
+    def _reiniciar_conteos(self, n_caracteristicas):
+        self.conteos_clase = np.zeros((2, n_caracteristicas))
+        self.documentos_clase = np.zeros(2)
+    
+    def _acumular(self, X, etiquetas, pesos=None):
+        # Suma solo las filas de cada clase sobre la matriz dispersa; con pesos, cada fila
+        # cuenta como tantos mensajes como su peso (duplicados colapsados)
+        es_spam = etiquetas == 1
+        if pesos is None:
+            self.conteos_clase[1] += np.asarray(X[es_spam].sum(axis=0)).ravel()
+            self.conteos_clase[0] += np.asarray(X[~es_spam].sum(axis=0)).ravel()
+            self.documentos_clase += [np.count_nonzero(~es_spam), np.count_nonzero(es_spam)]
+        else:
+            self.conteos_clase[1] += X[es_spam].T @ pesos[es_spam]
+            self.conteos_clase[0] += X[~es_spam].T @ pesos[~es_spam]
+            self.documentos_clase += [pesos[~es_spam].sum(), pesos[es_spam].sum()]
+    
+    def _pesos(self, data):
+        # Columna peso de DataManager si los duplicados se colapsaron; si no, None
+        return data["peso"].to_numpy(dtype=float) if "peso" in data.columns else None
+    
+    def _actualizar_probabilidades(self):
+        # Calcular probabilidades previas
+        self.P_spam = self.documentos_clase[1] / self.documentos_clase.sum()
+        self.P_ham = 1 - self.P_spam
+        
+        # Calcular probabilidades condicionales (con suavizado aditivo si alpha > 0)
+        suma_ham, suma_spam = self.conteos_clase + self.alpha
+        P_caracteristicas_spam = suma_spam / suma_spam.sum()
+        P_caracteristicas_ham = suma_ham / suma_ham.sum()
+        
+        # Evitar problemas numéricos
+        self.P_caracteristicas_spam = np.clip(P_caracteristicas_spam, 1e-10, 1)
+        self.P_caracteristicas_ham = np.clip(P_caracteristicas_ham, 1e-10, 1)
+        self._actualizar_log_probabilidades()
+        
+        # Totales con los que se normalizó; update los mantiene al día
+        self._totales_referencia = np.array([suma_ham.sum(), suma_spam.sum()])
+        self._totales_clase = self._totales_referencia.copy()
+        self.log_normalizacion = np.zeros(2)
+    
+    def update(self, messages, labels):
+        # Aprendizaje en línea: suma mensajes etiquetados (1 = spam, 0 = no spam) a los
+        # conteos y refresca solo las columnas que aparecen en ellos, O(tokens del lote).
+        # El cambio del total de cada clase se aplica como una corrección en log_normalizacion;
+        # P_caracteristicas_* se recalculan completas en la siguiente llamada a save
         if not self.is_trained:
             raise ValueError("El modelo no ha sido entrenado")
+        if self.conteos_clase is None:
+            raise ValueError("El modelo no conserva los conteos por clase; vuelve a entrenarlo")
+        etiquetas = np.asarray(labels, dtype=int)
+        X = self.vectorizer.transform(messages).tocsr()
+        if X.shape[0] != len(etiquetas):
+            raise ValueError("Debe haber una etiqueta por mensaje")
+        self._hacer_modificable()
         
-        # Vectorizar mensaje
-        message_vector = self.vectorizer.transform([message]).toarray()
+        columnas = []
+        for clase in (0, 1):
+            filas = X[etiquetas == clase]
+            np.add.at(self.conteos_clase[clase], filas.indices, filas.data)
+            self.documentos_clase[clase] += filas.shape[0]
+            self._totales_clase[clase] += filas.data.sum()
+            columnas.append(filas.indices)
+        columnas = np.unique(np.concatenate(columnas))
         
-        # Calcular log-probabilidades
-        log_prob_spam = np.log(self.P_spam) + np.sum(np.log(self.P_caracteristicas_spam) * message_vector, axis=1)
-        log_prob_ham = np.log(self.P_ham) + np.sum(np.log(self.P_caracteristicas_ham) * message_vector, axis=1)
+        # Columnas tocadas: relativas a los totales de referencia, como las demás
+        escala = self._totales_clase / self._totales_referencia
+        relativas = (self.conteos_clase[:, columnas].T + self.alpha) / self._totales_referencia
+        self.log_caracteristicas[columnas] = np.log(np.clip(relativas, 1e-10 * escala, escala))
+        self.log_normalizacion = np.log(escala)
+        
+        self.P_spam = self.documentos_clase[1] / self.documentos_clase.sum()
+        self.P_ham = 1 - self.P_spam
+        self.log_previas = np.log([self.P_ham, self.P_spam])
+    
+    def _hacer_modificable(self):
+        # Un modelo cargado apunta al archivo mapeado (solo lectura): se copia al modificarlo
+        if not self.log_caracteristicas.flags.writeable:
+            self.log_caracteristicas = self.log_caracteristicas.copy()
+            self.conteos_clase = self.conteos_clase.copy()
+    
+    def _soltar_mapa(self):
+        # Copia a memoria los arreglos que aún apuntan al archivo mapeado y cierra el mapa.
+        # Solo hace falta antes de sobrescribir ese mismo archivo: en Windows no se puede
+        # reemplazar un archivo mientras está mapeado
+        self.log_previas = np.array(self.log_previas)
+        self.log_caracteristicas = np.array(self.log_caracteristicas)
+        if self.conteos_clase is not None:
+            self.conteos_clase = np.array(self.conteos_clase)
+        if isinstance(self.vectorizer, TfidfVectorizer):
+            self.vectorizer.idf_ = np.array(self.vectorizer.idf_)
+        _, datos = self._mapa
+        self._mapa = None
+        try:
+            datos.close()
+        except BufferError:
+            # Alguien más conserva una vista; el mapa se libera junto con ella
+            pass
+    
+    def _actualizar_log_probabilidades(self):
+        # Precalcula los logaritmos una sola vez por entrenamiento
+        self.log_caracteristicas = np.column_stack([
+            np.log(self.P_caracteristicas_ham), np.log(self.P_caracteristicas_spam)
+        ])
+        self.log_previas = np.log([self.P_ham, self.P_spam])
+    
+    def save(self, path):
+        # Guarda el modelo entrenado en un archivo binario compacto (ver CABECERA)
+        if not self.is_trained:
+            raise ValueError("El modelo no ha sido entrenado")
+        con_conteos = self.conteos_clase is not None
+        if con_conteos and self.log_normalizacion.any():
+            # Tras actualizaciones en línea se renormaliza todo antes de guardar
+            self._actualizar_probabilidades()
         
-        # Determinar clase y calcular probabilidades
-        is_spam = log_prob_spam > log_prob_ham
-        prob_spam = np.exp(log_prob_spam) / (np.exp(log_prob_spam) + np.exp(log_prob_ham))
-        prob_ham = np.exp(log_prob_ham) / (np.exp(log_prob_spam) + np.exp(log_prob_ham))
+        n_caracteristicas = self.log_caracteristicas.shape[0]
+        if isinstance(self.vectorizer, HashingVectorizer):
+            tipo, idf, vocabulario = self.VECTORIZADOR_HASHING, np.empty(0), b""
+        else:
+            tipo, idf = self.VECTORIZADOR_TFIDF, self.vectorizer.idf_
+            vocabulario = "\n".join(self.vectorizer.get_feature_names_out()).encode("utf-8")
+        conteos = b""
+        if con_conteos:
+            conteos = b"".join([
+                np.array([self.alpha, *self.documentos_clase], dtype='<f8').tobytes(),
+                np.ascontiguousarray(self.conteos_clase, dtype='<f8').tobytes()
+            ])
+        cuerpo = b"".join([
+            np.asarray(self.log_previas, dtype='<f8').tobytes(),
+            np.ascontiguousarray(self.log_caracteristicas, dtype='<f8').tobytes(),
+            np.asarray(idf, dtype='<f8').tobytes(),
+            conteos,
+            vocabulario
+        ])
+        cabecera = self.CABECERA.pack(self.MAGIA, self.VERSION, tipo, n_caracteristicas,
+                                      len(vocabulario), zlib.crc32(cuerpo), *self.ngram_range, con_conteos)
         
+        # Se escribe a un temporal y se reemplaza, así ningún lector ve un archivo a medias
+        if self._mapa is not None and os.path.exists(path) and os.path.samefile(path, self._mapa[0]):
+            self._soltar_mapa()
+        temporal = path + ".tmp"
+        with open(temporal, 'wb') as f:
+            f.write(cabecera)
+            f.write(cuerpo)
+        os.replace(temporal, path)
+    
+    @classmethod
+    def load(cls, path):
+        # Carga un modelo guardado con save. Los pesos se leen directamente del archivo
+        # mapeado en memoria, así varios procesos comparten las mismas páginas. Se guarda
+        # el mapa para que save sobre este mismo archivo pueda cerrarlo antes de reemplazarlo
+        with open(path, 'rb') as f:
+            datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(datos) < cls.CABECERA.size:
+            datos.close()
+            raise ValueError(f"Archivo de modelo inválido: {path}")
+        (magia, version, tipo, n, bytes_vocabulario, crc,
+         ngrama_min, ngrama_max, con_conteos) = cls.CABECERA.unpack_from(datos, 0)
+        inicio = cls.CABECERA.size
+        n_idf = n if tipo == cls.VECTORIZADOR_TFIDF else 0
+        n_conteos = 3 + 2 * n if con_conteos else 0
+        valido = (
+            (magia, version) == (cls.MAGIA, cls.VERSION)
+            and tipo in (cls.VECTORIZADOR_TFIDF, cls.VECTORIZADOR_HASHING)
+            and len(datos) - inicio == 8 * (2 + 2 * n + n_idf + n_conteos) + bytes_vocabulario
+            and zlib.crc32(datos[inicio:]) == crc
+        )
+        if not valido:
+            datos.close()
+            raise ValueError(f"Archivo de modelo inválido o de otra versión: {path}")
+        
+        def seccion(cantidad):
+            # Arreglo de solo lectura sobre el archivo mapeado; avanza el desplazamiento
+            nonlocal inicio
+            arreglo = np.frombuffer(datos, dtype='<f8', count=cantidad, offset=inicio)
+            inicio += 8 * cantidad
+            return arreglo
+        
+        modelo = cls(max_features=n, ngram_range=(ngrama_min, ngrama_max))
+        modelo.log_previas = seccion(2)
+        modelo.log_caracteristicas = seccion(2 * n).reshape(n, 2)
+        idf = seccion(n_idf)
+        if con_conteos:
+            modelo.alpha, *documentos = seccion(3)
+            modelo.documentos_clase = np.array(documentos)
+            modelo.conteos_clase = seccion(2 * n).reshape(2, n)
+            modelo._totales_referencia = modelo.conteos_clase.sum(axis=1) + modelo.alpha * n
+            modelo._totales_clase = modelo._totales_referencia.copy()
+        if tipo == cls.VECTORIZADOR_TFIDF:
+            terminos = datos[inicio:].decode("utf-8").split("\n")
+            modelo.vectorizer = TfidfVectorizer(stop_words='english', ngram_range=modelo.ngram_range,
+                                                vocabulary={termino: i for i, termino in enumerate(terminos)})
+            modelo.vectorizer.idf_ = idf
+        else:
+            modelo.vectorizer = HashingVectorizer(stop_words='english', n_features=n, alternate_sign=False,
+                                                ngram_range=modelo.ngram_range)
+        
+        modelo.P_ham, modelo.P_spam = np.exp(modelo.log_previas)
+        modelo.P_caracteristicas_ham = np.exp(modelo.log_caracteristicas[:, 0])
+        modelo.P_caracteristicas_spam = np.exp(modelo.log_caracteristicas[:, 1])
+        modelo.is_trained = True
+        modelo._mapa = (path, datos)
+        return modelo
+    
+    def export_scorer(self, path):
+        # Compila el modelo para Puntuador.py, que solo necesita la biblioteca estándar:
+        # por término, w_spam - w_ham e idf; más el sesgo log P(spam) - log P(ham).
+        # La corrección de update se pliega en los pesos, así que no hace falta guardar antes
+        if not self.is_trained:
+            raise ValueError("El modelo no ha sido entrenado")
+        if isinstance(self.vectorizer, HashingVectorizer):
+            raise ValueError("Solo se pueden exportar modelos con vocabulario TF-IDF (no de hashing)")
+        
+        diferencia = ((self.log_caracteristicas[:, 1] - self.log_normalizacion[1])
+                      - (self.log_caracteristicas[:, 0] - self.log_normalizacion[0]))
+        idf = self.vectorizer.idf_
+        # Un vectorizador cargado o armado con vocabulario fijo aún no tiene vocabulary_
+        vocabulario = getattr(self.vectorizer, 'vocabulary_', None) or self.vectorizer.vocabulary
+        terminos = {
+            termino: [float(diferencia[i]), float(idf[i])]
+            for termino, i in vocabulario.items()
+        }
+        puntuador = {
+            'version': 1,
+            'token_pattern': self.vectorizer.token_pattern,
+            'ngram_range': list(self.ngram_range),
+            'stop_words': sorted(self.vectorizer.get_stop_words() or []),
+            'sesgo': float(self.log_previas[1] - self.log_previas[0]),
+            'terminos': terminos
+        }
+        temporal = path + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(puntuador, f, ensure_ascii=False)
+        os.replace(temporal, path)
+    
+    def predict(self, message):
+        # Realiza una predicción para un mensaje dado
+        result = self.predict_many([message])
         return {
-            'is_spam': bool(is_spam[0]),
-            'probability_spam': float(prob_spam[0]),
-            'probability_ham': float(prob_ham[0]),
-            'log_prob_spam': float(log_prob_spam[0]),
-            'log_prob_ham': float(log_prob_ham[0])
+            'is_spam': bool(result['is_spam'][0]),
+            'probability_spam': float(result['probability_spam'][0]),
+            'probability_ham': float(result['probability_ham'][0]),
+            'log_prob_spam': float(result['log_prob_spam'][0]),
+            'log_prob_ham': float(result['log_prob_ham'][0])
         }
     
-    def evaluate_model(self, data):
-        # Evalúa el modelo comparando con Scikit-learn
+    def predict_many(self, messages):
+        # Clasifica un lote de mensajes; devuelve arreglos de NumPy con una entrada por mensaje
         if not self.is_trained:
             raise ValueError("El modelo no ha sido entrenado")
         
-        # Dividir datos
-        X_train, X_test, y_train, y_test = train_test_split(
-            self.features_array, data["spam"], test_size=0.2, random_state=42, stratify=data["spam"]
-        )
+        # Una sola vectorización y un solo producto disperso matriz-vector para todo el lote
+        X = self.vectorizer.transform(messages)
+        log_conjunta = self._log_conjunta(X)
+        log_prob_ham, log_prob_spam = log_conjunta[:, 0], log_conjunta[:, 1]
         
-        # Naive Bayes manual
-        y_pred_manual = self._predict_batch(X_test)
+        # logsumexp estable: se resta el máximo antes de exponenciar para evitar el underflow
+        maximo = np.maximum(log_prob_spam, log_prob_ham)
+        log_evidencia = maximo + np.log(np.exp(log_prob_spam - maximo) + np.exp(log_prob_ham - maximo))
         
-        # Scikit-learn
-        self.sklearn_model = MultinomialNB()
-        self.sklearn_model.fit(X_train, y_train)
-        y_pred_sklearn = self.sklearn_model.predict(X_test)
+        return {
+            'is_spam': log_prob_spam > log_prob_ham,
+            'probability_spam': np.exp(log_prob_spam - log_evidencia),
+            'probability_ham': np.exp(log_prob_ham - log_evidencia),
+            'log_prob_spam': log_prob_spam,
+            'log_prob_ham': log_prob_ham
+        }
+    
+    def evaluate_model(self, data):
+        # Evalúa el modelo comparando con Scikit-learn
+        if not self.is_trained:
+            raise ValueError("El modelo no ha sido entrenado")
+        if self.features is None:
+            raise ValueError("El modelo entrenado por bloques no conserva la matriz de características")
         
-        # Calcular métricas
-        manual_metrics = self._calculate_metrics(y_test, y_pred_manual)
-        sklearn_metrics = self._calculate_metrics(y_test, y_pred_sklearn)
+        with etapa(self.perfilador, "Evaluación"):
+            # Dividir datos
+            pesos = self._pesos(data)
+            if "grupo" in data.columns:
+                # Un grupo de duplicados queda entero en entrenamiento o en prueba
+                indices_train, indices_test = dividir_por_grupos(data["spam"], data["grupo"])
+            else:
+                indices_train, indices_test = train_test_split(
+                    np.arange(len(data)), test_size=0.2, random_state=42, stratify=data["spam"]
+                )
+            X_train, X_test = self.features[indices_train], self.features[indices_test]
+            y_train, y_test = data["spam"].iloc[indices_train], data["spam"].iloc[indices_test]
+            w_train = None if pesos is None else pesos[indices_train]
+            w_test = None if pesos is None else pesos[indices_test]
+            
+            # Naive Bayes manual: conteos solo de la parte de entrenamiento, igual que Scikit-learn,
+            # para que ningún mensaje de prueba influya en los pesos con los que se evalúa
+            with etapa(self.perfilador, "Naive Bayes manual"):
+                evaluador = NaiveBayes(alpha=self.alpha)
+                evaluador._reiniciar_conteos(X_train.shape[1])
+                evaluador._acumular(X_train, y_train.to_numpy(), w_train)
+                evaluador._actualizar_probabilidades()
+                y_pred_manual = evaluador._predict_batch(X_test)
+            
+            # Scikit-learn
+            with etapa(self.perfilador, "Comparación Scikit-learn"):
+                self.sklearn_model = MultinomialNB()
+                self.sklearn_model.fit(X_train, y_train, sample_weight=w_train)
+                y_pred_sklearn = self.sklearn_model.predict(X_test)
+            
+            # Calcular métricas (ponderadas por el número de copias de cada mensaje)
+            manual_metrics = self._calculate_metrics(y_test, y_pred_manual, w_test)
+            sklearn_metrics = self._calculate_metrics(y_test, y_pred_sklearn, w_test)
         
         return {
             'manual': manual_metrics,
@@ -100,18 +432,24 @@ class NaiveBayes:
         }
     
     def _predict_batch(self, X):
-        # Realiza predicciones en batch usando Naive Bayes manual
-        log_prob_spam = np.log(self.P_spam) + np.sum(np.log(self.P_caracteristicas_spam) * X, axis=1)
-        log_prob_ham = np.log(self.P_ham) + np.sum(np.log(self.P_caracteristicas_ham) * X, axis=1)
-        return (log_prob_spam > log_prob_ham).astype(int)
+        # Realiza predicciones en batch usando Naive Bayes manual (X puede ser dispersa)
+        log_conjunta = self._log_conjunta(X)
+        return (log_conjunta[:, 1] > log_conjunta[:, 0]).astype(int)
+    
+    def _log_conjunta(self, X):
+        # Log-probabilidad conjunta por clase (columnas [ham, spam]) de cada fila de X
+        log_conjunta = X @ self.log_caracteristicas + self.log_previas
+        if self.log_normalizacion.any():
+            log_conjunta -= np.asarray(X.sum(axis=1)).reshape(-1, 1) * self.log_normalizacion
+        return log_conjunta
     
-    def _calculate_metrics(self, y_true, y_pred):
+    def _calculate_metrics(self, y_true, y_pred, sample_weight=None):
         # Calcula métricas de evaluación
         return {
-            'accuracy': accuracy_score(y_true, y_pred),
-            'precision': precision_score(y_true, y_pred),
-            'recall': recall_score(y_true, y_pred),
-            'f1': f1_score(y_true, y_pred)
+            'accuracy': accuracy_score(y_true, y_pred, sample_weight=sample_weight),
+            'precision': precision_score(y_true, y_pred, sample_weight=sample_weight),
+            'recall': recall_score(y_true, y_pred, sample_weight=sample_weight),
+            'f1': f1_score(y_true, y_pred, sample_weight=sample_weight)
         }
     
     def get_training_info(self):
@@ -122,6 +460,6 @@ class NaiveBayes:
         return {
             'P_spam': self.P_spam,
             'P_ham': self.P_ham,
-            'vocabulary_size': len(self.vectorizer.get_feature_names_out()) if self.vectorizer else 0,
+            'vocabulary_size': len(self.P_caracteristicas_spam),
             'is_trained': self.is_trained
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Perfilado por etapas del detector de spam: tiempo de reloj, tiempo de CPU y pico de
+memoria de cada etapa de carga, entrenamiento y evaluación.
+
+DataManager y NaiveBayes registran sus etapas en el Perfilador asignado a su atributo
+perfilador (None = sin medir). El reporte se muestra en el panel de métricas y se
+exporta a JSON para comparar ejecuciones con distintos tamaños de dataset:
+
+    python Perfilador.py spam.csv --salida perfil.json
+    python Perfilador.py spam.csv --filas 1000 --salida perfil_1000.json
+"""
+import argparse
+import contextlib
+import json
+import platform
+import time
+import tracemalloc
+
+
+class Perfilador:
+    """Acumula una fila por etapa; las etapas pueden anidarse (p. ej. el ajuste TF-IDF dentro de train)"""
+
+    def __init__(self, memoria=True, etapas=None):
+        # memoria=True mide el pico con tracemalloc, que hace más lentas las asignaciones
+        self.memoria = memoria
+        self.etapas = list(etapas or [])
+        self._pila = []
+        self._inicio_tracemalloc = False
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        """Mide el bloque with como una etapa con el nombre dado"""
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._inicio_tracemalloc = True
+            if self._pila:
+                # El pico del padre se conserva antes de reiniciarlo para esta etapa
+                self._pila[-1]['pico'] = max(self._pila[-1]['pico'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            actual = tracemalloc.get_traced_memory()[0]
+        else:
+            actual = 0
+
+        fila = {'nombre': nombre, 'nivel': len(self._pila)}
+        self.etapas.append(fila)
+        marco = {'memoria_inicial': actual, 'pico': actual}
+        self._pila.append(marco)
+        inicio_reloj = time.perf_counter()
+        inicio_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            fila['segundos'] = time.perf_counter() - inicio_reloj
+            fila['cpu_segundos'] = time.process_time() - inicio_cpu
+            self._pila.pop()
+            if self.memoria:
+                marco['pico'] = max(marco['pico'], tracemalloc.get_traced_memory()[1])
+                fila['memoria_pico_mb'] = (marco['pico'] - marco['memoria_inicial']) / 2 ** 20
+                if self._pila:
+                    self._pila[-1]['pico'] = max(self._pila[-1]['pico'], marco['pico'])
+                elif self._inicio_tracemalloc:
+                    tracemalloc.stop()
+                    self._inicio_tracemalloc = False
+            else:
+                fila['memoria_pico_mb'] = None
+
+    def reiniciar(self):
+        self.etapas = []
+
+    def reporte(self):
+        """Tabla de texto con una línea por etapa (las anidadas, sangradas)"""
+        if not self.etapas:
+            return "No hay etapas medidas"
+        lineas = [f"{'Etapa':<34}{'Reloj (s)':>11}{'CPU (s)':>10}{'Memoria (MB)':>14}"]
+        for fila in self.etapas:
+            nombre = '  ' * fila['nivel'] + fila['nombre']
+            memoria = '-' if fila.get('memoria_pico_mb') is None else f"{fila['memoria_pico_mb']:.1f}"
+            lineas.append(f"{nombre:<34}{fila.get('segundos', 0.0):>11.3f}"
+                          f"{fila.get('cpu_segundos', 0.0):>10.3f}{memoria:>14}")
+        return "\n".join(lineas)
+
+    def a_dict(self, **contexto):
+        """Etapas y contexto de la ejecución (archivo, filas, vocabulario...) para exportar"""
+        return {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'contexto': contexto,
+            'etapas': self.etapas
+        }
+
+    def exportar(self, ruta, **contexto):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(**contexto), f, indent=2, ensure_ascii=False)
+
+
+def etapa(perfilador, nombre):
+    """perfilador.etapa(nombre), o un contexto vacío si no se está perfilando"""
+    if perfilador is None:
+        return contextlib.nullcontext()
+    return perfilador.etapa(nombre)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil por etapas de la carga, el entrenamiento y la evaluación")
+    parser.add_argument('datos', help="archivo CSV con etiqueta y texto")
+    parser.add_argument('--filas', type=int, help="entrenar solo con las primeras N filas")
+    parser.add_argument('--sin-cache', action='store_true', help="no usar la caché de datos limpios")
+    parser.add_argument('--sin-memoria', action='store_true', help="no medir memoria (sin tracemalloc)")
+    parser.add_argument('--salida', help="archivo JSON donde exportar el perfil")
+    args = parser.parse_args()
+
+    # Importados aquí: DataManager y NaiveBayes importan este módulo
+    from DataManager import DataManager
+    from NaiveBayes import NaiveBayes
+
+    perfilador = Perfilador(memoria=not args.sin_memoria)
+    data_manager = DataManager(use_cache=not args.sin_cache)
+    data_manager.perfilador = perfilador
+    success, message = data_manager.load_data(args.datos)
+    if not success:
+        raise SystemExit(message)
+    data = data_manager.data if args.filas is None else data_manager.data.iloc[:args.filas]
+
+    model = NaiveBayes()
+    model.perfilador = perfilador
+    success, message = model.train(data)
+    if not success:
+        raise SystemExit(message)
+    model.evaluate_model(data)
+
+    print(perfilador.reporte())
+    if args.salida:
+        perfilador.exportar(args.salida, archivo=args.datos, filas=len(data),
+                            vocabulario=len(model.P_caracteristicas_spam))
+        print(f"Perfil exportado a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
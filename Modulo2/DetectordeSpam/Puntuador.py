@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Puntuador independiente para modelos exportados con NaiveBayes.export_scorer.
+
+Solo usa la biblioteca estándar: no importa sklearn ni NumPy, así que arranca en
+milisegundos y sirve para desplegar el modelo donde no están instalados. Reproduce el
+analizador de TfidfVectorizer (minúsculas, token_pattern, stop words y n-gramas) y
+clasifica cada mensaje en una sola pasada de tokenización:
+
+    puntuación = sesgo + Σ conteo·idf·(w_spam - w_ham) / ‖conteo·idf‖
+
+con P(spam) = 1 / (1 + e^-puntuación), igual que NaiveBayes.predict.
+
+    python Puntuador.py --exportar modelo_spam.nbm puntuador_spam.json
+    python Puntuador.py puntuador_spam.json "WINNER!! Claim your prize now"
+    python Puntuador.py puntuador_spam.json < mensajes.txt
+"""
+import argparse
+import json
+import math
+import re
+import sys
+
+
+class Puntuador:
+    """Clasificador de spam a partir del archivo JSON de NaiveBayes.export_scorer"""
+
+    def __init__(self, ruta):
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        if datos.get('version') != 1:
+            raise ValueError(f"Archivo de puntuador inválido o de otra versión: {ruta}")
+        self._token = re.compile(datos['token_pattern'])
+        self.ngram_min, self.ngram_max = datos['ngram_range']
+        self.stop_words = frozenset(datos['stop_words'])
+        self.sesgo = datos['sesgo']
+        self.terminos = {termino: tuple(valores) for termino, valores in datos['terminos'].items()}
+
+    def _conteos(self, mensaje):
+        # Conteo de los términos del vocabulario en el mensaje (los demás no aportan)
+        conteos = {}
+        palabras = [palabra for palabra in self._token.findall(mensaje.lower())
+                    if palabra not in self.stop_words]
+        for n in range(self.ngram_min, self.ngram_max + 1):
+            for i in range(len(palabras) - n + 1):
+                termino = palabras[i] if n == 1 else ' '.join(palabras[i:i + n])
+                if termino in self.terminos:
+                    conteos[termino] = conteos.get(termino, 0) + 1
+        return conteos
+
+    def puntuar(self, mensaje):
+        """log P(spam|mensaje) - log P(ham|mensaje)"""
+        producto = 0.0
+        norma = 0.0
+        for termino, conteo in self._conteos(mensaje).items():
+            peso, idf = self.terminos[termino]
+            valor = conteo * idf
+            producto += valor * peso
+            norma += valor * valor
+        if norma == 0.0:
+            return self.sesgo
+        return self.sesgo + producto / math.sqrt(norma)
+
+    def predict(self, mensaje):
+        """Mismo resultado que NaiveBayes.predict (sin las log-probabilidades conjuntas)"""
+        puntuacion = self.puntuar(mensaje)
+        # Sigmoide estable para puntuaciones muy grandes en valor absoluto
+        if puntuacion >= 0:
+            probabilidad_spam = 1 / (1 + math.exp(-puntuacion))
+        else:
+            exponencial = math.exp(puntuacion)
+            probabilidad_spam = exponencial / (1 + exponencial)
+        return {
+            'is_spam': puntuacion > 0,
+            'probability_spam': probabilidad_spam,
+            'probability_ham': 1 - probabilidad_spam
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clasifica mensajes con un modelo exportado (sin sklearn)")
+    parser.add_argument('--exportar', metavar='MODELO_NBM',
+                        help="compila un modelo .nbm en el archivo puntuador y termina (requiere sklearn)")
+    parser.add_argument('puntuador', help="archivo JSON del puntuador")
+    parser.add_argument('mensajes', nargs='*', help="mensajes a clasificar (por defecto, uno por línea de stdin)")
+    args = parser.parse_args()
+
+    if args.exportar:
+        # Solo exportar necesita el modelo completo
+        from NaiveBayes import NaiveBayes
+        NaiveBayes.load(args.exportar).export_scorer(args.puntuador)
+        print(f"Puntuador exportado a {args.puntuador}")
+        return
+
+    puntuador = Puntuador(args.puntuador)
+    mensajes = args.mensajes or (linea.rstrip('\n') for linea in sys.stdin)
+    for mensaje in mensajes:
+        resultado = puntuador.predict(mensaje)
+        etiqueta = 'spam' if resultado['is_spam'] else 'ham'
+        print(f"{etiqueta}\t{resultado['probability_spam']:.6f}\t{mensaje}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Servicio HTTP local para clasificar mensajes con un modelo NaiveBayes guardado.
+
+Las solicitudes concurrentes se agrupan durante unos milisegundos y se puntúan en
+un solo lote con predict_many.
+
+Endpoints:
+    POST /predict   {"message": "..."} o {"messages": ["...", ...]}
+    GET  /health    estado del servicio
+    GET  /metrics   latencia (p50/p95/p99), rendimiento y tamaño medio de lote
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from NaiveBayes import NaiveBayes
+
+
+def percentil(valores, p):
+    # Percentil por el método del rango más cercano; valores debe venir ordenado
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, max(0, int(round(p / 100 * len(valores))) - 1))
+    return valores[indice]
+
+
+class LoteadorPredicciones:
+    """Agrupa las solicitudes que llegan dentro de una ventana corta y las puntúa juntas"""
+
+    def __init__(self, model, espera_ms=5.0, lote_maximo=256):
+        self.model = model
+        self.espera = espera_ms / 1000
+        self.lote_maximo = lote_maximo
+        self._cola = queue.Queue()
+        # Estadísticas para /metrics
+        self._lock = threading.Lock()
+        self._latencias = deque(maxlen=10000)  # segundos, últimas solicitudes
+        self.solicitudes = 0
+        self.mensajes = 0
+        self.lotes = 0
+        self.inicio = time.time()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, textos):
+        """Encola una lista de mensajes; devuelve un Future con el resultado"""
+        futuro = Future()
+        self._cola.put((textos, futuro))
+        return futuro
+
+    def cerrar(self):
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _bucle(self):
+        while True:
+            primero = self._cola.get()
+            if primero is None:
+                return
+
+            # Junta lo que llegue hasta que venza la ventana o se llene el lote
+            pendientes = [primero]
+            total = len(primero[0])
+            limite = time.perf_counter() + self.espera
+            cerrar = False
+            while total < self.lote_maximo:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    siguiente = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if siguiente is None:
+                    cerrar = True
+                    break
+                pendientes.append(siguiente)
+                total += len(siguiente[0])
+
+            self._puntuar(pendientes)
+            if cerrar:
+                return
+
+    def _puntuar(self, pendientes):
+        textos = [texto for textos, _ in pendientes for texto in textos]
+        try:
+            resultado = self.model.predict_many(textos)
+        except Exception as e:
+            for _, futuro in pendientes:
+                futuro.set_exception(e)
+            return
+
+        with self._lock:
+            self.lotes += 1
+            self.mensajes += len(textos)
+
+        inicio = 0
+        for textos_solicitud, futuro in pendientes:
+            fin = inicio + len(textos_solicitud)
+            futuro.set_result([
+                {'is_spam': bool(es_spam), 'probability_spam': float(prob_spam)}
+                for es_spam, prob_spam in zip(resultado['is_spam'][inicio:fin], resultado['probability_spam'][inicio:fin])
+            ])
+            inicio = fin
+
+    def registrar_latencia(self, segundos):
+        with self._lock:
+            self.solicitudes += 1
+            self._latencias.append(segundos)
+
+    def metricas(self):
+        with self._lock:
+            latencias = sorted(self._latencias)
+            transcurrido = time.time() - self.inicio
+            return {
+                'solicitudes': self.solicitudes,
+                'mensajes': self.mensajes,
+                'lotes': self.lotes,
+                'tamano_medio_lote': self.mensajes / self.lotes if self.lotes else 0.0,
+                'latencia_ms': {
+                    'p50': percentil(latencias, 50) * 1000,
+                    'p95': percentil(latencias, 95) * 1000,
+                    'p99': percentil(latencias, 99) * 1000
+                },
+                'solicitudes_por_segundo': self.solicitudes / transcurrido if transcurrido else 0.0,
+                'mensajes_por_segundo': self.mensajes / transcurrido if transcurrido else 0.0,
+                'activo_segundos': transcurrido
+            }
+
+
+class ManejadorSpam(BaseHTTPRequestHandler):
+    """Atiende /predict, /health y /metrics; el loteador y el modelo viven en el servidor"""
+
+    def do_GET(self):
+        loteador = self.server.loteador
+        if self.path == '/health':
+            self._responder(200, {'status': 'ok', 'modelo': self.server.ruta_modelo,
+                                  'is_trained': loteador.model.is_trained})
+        elif self.path == '/metrics':
+            self._responder(200, loteador.metricas())
+        else:
+            self._responder(404, {'error': 'Ruta no encontrada'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._responder(404, {'error': 'Ruta no encontrada'})
+            return
+
+        inicio = time.perf_counter()
+        try:
+            longitud = int(self.headers.get('Content-Length', 0))
+            cuerpo = json.loads(self.rfile.read(longitud) or b'{}')
+            if not isinstance(cuerpo, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON")
+            individual = 'messages' not in cuerpo
+            if not individual:
+                textos = cuerpo['messages']
+                if not isinstance(textos, list) or not all(isinstance(texto, str) for texto in textos):
+                    raise ValueError("'messages' debe ser una lista de cadenas")
+            elif 'message' in cuerpo:
+                textos = [str(cuerpo['message'])]
+            else:
+                raise ValueError("Se esperaba 'message' o 'messages'")
+        except (ValueError, TypeError) as e:
+            self._responder(400, {'error': str(e)})
+            return
+        if not textos:
+            # Nada que clasificar: no se ocupa un lugar en el lote
+            self._responder(200, [])
+            return
+
+        try:
+            resultados = self.server.loteador.enviar(textos).result(timeout=30)
+        except Exception as e:
+            self._responder(500, {'error': str(e)})
+            return
+
+        self.server.loteador.registrar_latencia(time.perf_counter() - inicio)
+        self._responder(200, resultados[0] if individual else resultados)
+
+    def _responder(self, codigo, datos):
+        cuerpo = json.dumps(datos).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        # Sin una línea de log por solicitud: distorsiona las mediciones de latencia
+        pass
+
+
+class ServidorSpam(ThreadingHTTPServer):
+    daemon_threads = True
+    # La cola de conexiones por defecto (5) rechaza ráfagas de clientes concurrentes
+    request_queue_size = 128
+
+
+def crear_servidor(model, host='127.0.0.1', puerto=8000, espera_ms=5.0, lote_maximo=256, ruta_modelo=None):
+    servidor = ServidorSpam((host, puerto), ManejadorSpam)
+    servidor.loteador = LoteadorPredicciones(model, espera_ms, lote_maximo)
+    servidor.ruta_modelo = ruta_modelo
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de clasificación de spam")
+    parser.add_argument('modelo', help="archivo .nbm guardado con NaiveBayes.save")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--espera-ms', type=float, default=5.0,
+                        help="ventana para agrupar solicitudes en un lote (ms)")
+    parser.add_argument('--lote-maximo', type=int, default=256)
+    args = parser.parse_args()
+
+    model = NaiveBayes.load(args.modelo)
+    servidor = crear_servidor(model, args.host, args.puerto, args.espera_ms, args.lote_maximo, args.modelo)
+    print(f"Sirviendo en http://{args.host}:{args.puerto} (Ctrl+C para detener)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.loteador.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Validación cruzada estratificada de k pliegues y barrido de hiperparámetros del
+modelo NaiveBayes.
+
+A diferencia de evaluate_model, el vectorizador TF-IDF se ajusta dentro de cada
+pliegue solo con los mensajes de entrenamiento, así que el conjunto de prueba no
+influye en el vocabulario ni en los pesos IDF. Cada combinación (configuración,
+pliegue) es una tarea independiente que se reparte en un pool de procesos. Si los
+duplicados están colapsados (columnas peso y grupo de DataManager), los pliegues
+mantienen cada grupo entero y las métricas se ponderan por el número de copias.
+
+    python ValidacionCruzada.py spam.csv --pliegues 5 --objetivo 0.98
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedGroupKFold, StratifiedKFold
+
+from DataManager import DataManager
+from NaiveBayes import NaiveBayes
+
+# Rejilla por defecto del barrido
+MAX_FEATURES = (1000, 5000, 20000)
+NGRAM_RANGES = ((1, 1), (1, 2))
+ALPHAS = (0.0, 0.1, 1.0)
+
+# Datos del proceso del pool, recibidos una sola vez en _iniciar_proceso
+_textos = None
+_etiquetas = None
+_pesos = None
+
+
+def _iniciar_proceso(textos, etiquetas, pesos):
+    global _textos, _etiquetas, _pesos
+    _textos, _etiquetas, _pesos = textos, etiquetas, pesos
+
+
+def _evaluar_pliegue(tarea):
+    # Entrena y evalúa una configuración en un pliegue; devuelve una fila de resultados
+    configuracion, pliegue, indices_train, indices_test = tarea
+    entrenamiento = pd.DataFrame({'texto': _textos[indices_train], 'spam': _etiquetas[indices_train],
+                                  'peso': _pesos[indices_train]})
+    modelo = NaiveBayes(**configuracion)
+
+    inicio = time.perf_counter()
+    success, message = modelo.train(entrenamiento)
+    if not success:
+        raise RuntimeError(message)
+    tiempo_entrenamiento = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    prediccion = modelo.predict_many(_textos[indices_test])['is_spam'].astype(int)
+    tiempo_prediccion = time.perf_counter() - inicio
+
+    fila = dict(configuracion)
+    fila['ngram_range'] = str(configuracion['ngram_range'])
+    fila.update({
+        'pliegue': pliegue,
+        'vocabulario': len(modelo.P_caracteristicas_spam),
+        'tiempo_entrenamiento': tiempo_entrenamiento,
+        'tiempo_prediccion': tiempo_prediccion,
+        'mensajes_por_segundo': len(indices_test) / tiempo_prediccion if tiempo_prediccion else 0.0
+    })
+    fila.update(modelo._calculate_metrics(_etiquetas[indices_test], prediccion, _pesos[indices_test]))
+    return fila
+
+
+def validacion_cruzada(data, max_features=MAX_FEATURES, ngram_ranges=NGRAM_RANGES, alphas=ALPHAS,
+                       pliegues=5, procesos=None, random_state=42):
+    """
+    Evalúa cada combinación de la rejilla con k pliegues estratificados.
+    Devuelve un DataFrame con una fila por (configuración, pliegue): métricas y tiempos.
+    """
+    textos = data['texto'].to_numpy(dtype=object)
+    etiquetas = data['spam'].to_numpy()
+    pesos = data['peso'].to_numpy(dtype=float) if 'peso' in data.columns else np.ones(len(data))
+    if 'grupo' in data.columns:
+        divisor = StratifiedGroupKFold(n_splits=pliegues, shuffle=True, random_state=random_state)
+        particiones = list(divisor.split(textos, etiquetas, data['grupo']))
+    else:
+        divisor = StratifiedKFold(n_splits=pliegues, shuffle=True, random_state=random_state)
+        particiones = list(divisor.split(textos, etiquetas))
+    configuraciones = [
+        {'max_features': mf, 'ngram_range': tuple(ngram), 'alpha': alpha}
+        for mf, ngram, alpha in itertools.product(max_features, ngram_ranges, alphas)
+    ]
+    tareas = [
+        (configuracion, pliegue, indices_train, indices_test)
+        for configuracion in configuraciones
+        for pliegue, (indices_train, indices_test) in enumerate(particiones)
+    ]
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        _iniciar_proceso(textos, etiquetas, pesos)
+        filas = [_evaluar_pliegue(tarea) for tarea in tareas]
+    else:
+        with multiprocessing.Pool(procesos, initializer=_iniciar_proceso, initargs=(textos, etiquetas, pesos)) as pool:
+            filas = pool.map(_evaluar_pliegue, tareas, chunksize=1)
+    return pd.DataFrame(filas)
+
+
+def resumir(resultados):
+    """Promedia los pliegues de cada configuración; ordenado por exactitud descendente"""
+    claves = ['max_features', 'ngram_range', 'alpha']
+    resumen = resultados.groupby(claves, as_index=False).agg(
+        accuracy=('accuracy', 'mean'),
+        accuracy_std=('accuracy', 'std'),
+        precision=('precision', 'mean'),
+        recall=('recall', 'mean'),
+        f1=('f1', 'mean'),
+        tiempo_entrenamiento=('tiempo_entrenamiento', 'mean'),
+        tiempo_prediccion=('tiempo_prediccion', 'mean')
+    )
+    return resumen.sort_values('accuracy', ascending=False).reset_index(drop=True)
+
+
+def elegir_configuracion(resumen, exactitud_objetivo):
+    """La configuración más rápida (entrenamiento + predicción) que alcanza la exactitud objetivo"""
+    candidatas = resumen[resumen['accuracy'] >= exactitud_objetivo]
+    if candidatas.empty:
+        return None
+    costo = candidatas['tiempo_entrenamiento'] + candidatas['tiempo_prediccion']
+    return candidatas.loc[costo.idxmin()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validación cruzada y barrido de hiperparámetros")
+    parser.add_argument('datos', help="archivo CSV con etiqueta y texto")
+    parser.add_argument('--pliegues', type=int, default=5)
+    parser.add_argument('--procesos', type=int, default=None, help="por defecto, uno por núcleo")
+    parser.add_argument('--objetivo', type=float, default=0.98, help="exactitud mínima aceptable")
+    parser.add_argument('--salida', help="CSV donde guardar la tabla por pliegue")
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    success, message = data_manager.load_data(args.datos)
+    if not success:
+        raise SystemExit(message)
+
+    inicio = time.perf_counter()
+    resultados = validacion_cruzada(data_manager.data, pliegues=args.pliegues, procesos=args.procesos)
+    print(f"{len(resultados)} ajustes en {time.perf_counter() - inicio:.1f} s")
+    if args.salida:
+        resultados.to_csv(args.salida, index=False)
+
+    resumen = resumir(resultados)
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(resumen.to_string(float_format=lambda x: f"{x:.4f}"))
+    elegida = elegir_configuracion(resumen, args.objetivo)
+    if elegida is None:
+        print(f"Ninguna configuración alcanza una exactitud de {args.objetivo:.2%}")
+    else:
+        print(f"\nMás rápida con exactitud >= {args.objetivo:.2%}: max_features={elegida['max_features']}, "
+              f"ngram_range={elegida['ngram_range']}, alpha={elegida['alpha']} "
+              f"(exactitud {elegida['accuracy']:.2%})")
+
+
+if __name__ == "__main__":
+    main()
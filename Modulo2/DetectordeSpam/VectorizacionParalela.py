@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Vectorización TF-IDF repartida en un pool de procesos.
+
+La columna de texto se divide en fragmentos contiguos y cada proceso los tokeniza con
+el mismo analizador que TfidfVectorizer, devolviendo la matriz de conteos del fragmento
+con su vocabulario parcial. Al unir se suman las frecuencias de términos y de documentos,
+se eligen los max_features términos más frecuentes igual que sklearn y se aplican IDF y
+normalización L2. El resultado es la misma matriz que TfidfVectorizer.fit_transform y un
+vectorizador listo para transform.
+
+Cada proceso recibe su fragmento por pickle y devuelve una matriz dispersa, así que la
+ganancia aparece con corpus grandes (cientos de miles de mensajes) y varios núcleos.
+
+    python VectorizacionParalela.py spam.csv --procesos 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+
+def _contar_fragmento(tarea):
+    # Conteos (CSR) y vocabulario ordenado de un fragmento de textos
+    textos, ngram_range = tarea
+    contador = CountVectorizer(stop_words='english', ngram_range=ngram_range)
+    try:
+        conteos = contador.fit_transform(textos).tocsr()
+    except ValueError:
+        # Fragmento sin ningún término (solo stop words o textos vacíos)
+        return sp.csr_matrix((len(textos), 0), dtype=np.int64), np.array([], dtype=object)
+    return conteos, contador.get_feature_names_out()
+
+
+def vectorizar_paralelo(textos, max_features=5000, ngram_range=(1, 1), procesos=None):
+    """
+    Equivalente a TfidfVectorizer(stop_words='english', max_features, ngram_range).fit_transform
+    con la tokenización repartida en procesos. Devuelve (vectorizador ajustado, matriz CSR)
+    """
+    textos = list(textos)
+    procesos = procesos or os.cpu_count() or 1
+    ngram_range = tuple(ngram_range)
+    limites = np.linspace(0, len(textos), procesos + 1).astype(int)
+    tareas = [(textos[inicio:fin], ngram_range) for inicio, fin in zip(limites[:-1], limites[1:])]
+
+    if procesos == 1:
+        parciales = [_contar_fragmento(tarea) for tarea in tareas]
+    else:
+        with multiprocessing.Pool(procesos) as pool:
+            parciales = pool.map(_contar_fragmento, tareas, chunksize=1)
+
+    # Vocabulario global ordenado y, por fragmento, la columna global de cada término local
+    terminos = np.unique(np.concatenate([nombres for _, nombres in parciales]).astype(str))
+    columnas = [np.searchsorted(terminos, nombres.astype(str)) for _, nombres in parciales]
+
+    frecuencia = np.zeros(len(terminos), dtype=np.int64)
+    documentos = np.zeros(len(terminos), dtype=np.int64)
+    for (conteos, _), cols in zip(parciales, columnas):
+        frecuencia[cols] += np.asarray(conteos.sum(axis=0)).ravel()
+        documentos[cols] += np.bincount(conteos.indices, minlength=conteos.shape[1])
+
+    # Mismo criterio que CountVectorizer._limit_features (incluido el argsort por defecto,
+    # que decide los empates) sobre las frecuencias en orden alfabético
+    elegidos = np.arange(len(terminos))
+    if max_features is not None and max_features < len(terminos):
+        elegidos = np.sort((-frecuencia).argsort()[:max_features])
+    nuevo_indice = np.full(len(terminos), -1)
+    nuevo_indice[elegidos] = np.arange(len(elegidos))
+
+    bloques = []
+    for (conteos, _), cols in zip(parciales, columnas):
+        coo = conteos.tocoo()
+        destino = nuevo_indice[cols[coo.col]] if len(cols) else np.zeros(0, dtype=int)
+        conservar = destino >= 0
+        bloques.append(sp.csr_matrix((coo.data[conservar], (coo.row[conservar], destino[conservar])),
+                                     shape=(conteos.shape[0], len(elegidos)), dtype=np.float64))
+    conteos = sp.vstack(bloques, format='csr')
+    conteos.sort_indices()
+
+    # IDF suavizado y normalización L2, como TfidfTransformer con sus valores por defecto
+    idf = np.log((1 + len(textos)) / (1 + documentos[elegidos])) + 1
+    features = normalize(conteos @ sp.diags(idf), norm='l2', copy=False).tocsr()
+
+    vectorizador = TfidfVectorizer(stop_words='english', max_features=max_features, ngram_range=ngram_range,
+                                   vocabulary={termino: i for i, termino in enumerate(terminos[elegidos])})
+    vectorizador.idf_ = idf
+    return vectorizador, features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la vectorización TF-IDF en uno y varios procesos")
+    parser.add_argument('datos', help="archivo CSV con etiqueta y texto")
+    parser.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--max-features', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=3, help="se reporta el mejor tiempo")
+    args = parser.parse_args()
+
+    from DataManager import DataManager
+    # Se mide sobre todas las filas, sin colapsar duplicados
+    data_manager = DataManager(deduplicate=False)
+    success, message = data_manager.load_data(args.datos)
+    if not success:
+        raise SystemExit(message)
+    textos = data_manager.data['texto'].tolist()
+
+    def mejor_tiempo(funcion):
+        tiempos = []
+        for _ in range(args.repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos), resultado
+
+    referencia = TfidfVectorizer(stop_words='english', max_features=args.max_features)
+    base, esperada = mejor_tiempo(lambda: referencia.fit_transform(textos).tocsr())
+    print(f"{len(textos)} mensajes, {os.cpu_count()} núcleos disponibles")
+    print(f"TfidfVectorizer.fit_transform: {base:.3f} s")
+    for procesos in args.procesos:
+        segundos, (vectorizador, features) = mejor_tiempo(
+            lambda: vectorizar_paralelo(textos, args.max_features, procesos=procesos))
+        igual = (vectorizador.vocabulary == referencia.vocabulary_
+                 and abs(features - esperada).max() < 1e-12)
+        print(f"{procesos} procesos: {segundos:.3f} s, aceleración {base / segundos:.2f}x, "
+              f"misma matriz: {'sí' if igual else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1438 @@
+import tkinter as tk  
+from tkinter import messagebox  
+import argparse
+import contextlib
+import heapq  
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, List, Tuple, Optional 
+
+DIRECTORIO_MODULO = os.path.dirname(os.path.abspath(__file__))
+
+# ========== GEOMETRÍA DEL TABLERO ==========
+# Desplazamiento del espacio vacío para cada dirección, en filas y columnas
+DIRECCIONES = {"ARRIBA": (-1, 0), "ABAJO": (1, 0), "IZQUIERDA": (0, -1), "DERECHA": (0, 1)}
+
+# Cota superior conocida del número de movimientos de una solución óptima
+PROFUNDIDADES_MAXIMAS = {2: 6, 3: 31, 4: 80, 5: 205}
+
+class GeometriaTablero:
+    """
+    Tablas precalculadas para un tablero de tamano x tamano.
+    El tablero se empaqueta en un solo entero: `bits` bits por casilla,
+    la casilla i ocupa los bits [bits*i, bits*i + bits).
+    """
+    def __init__(self, tamano: int):
+        self.tamano = tamano
+        self.casillas = tamano * tamano
+        self.bits = max(1, (self.casillas - 1).bit_length())
+        self.mascara = (1 << self.bits) - 1
+        self.objetivo = list(range(1, self.casillas)) + [0]
+        self.codigo_objetivo = self.codificar(self.objetivo)
+        self.profundidad_maxima = PROFUNDIDADES_MAXIMAS.get(tamano)
+        # Para cada posición del vacío: lista de (dirección, nueva posición del vacío)
+        self.movimientos_por_posicion = [self._movimientos_desde(pos) for pos in range(self.casillas)]
+        # distancias_manhattan[pieza][pos]: distancia de la pieza en pos a su casilla objetivo
+        self.distancias_manhattan = [[0] * self.casillas] + [
+            [abs(pos // tamano - (pieza - 1) // tamano) + abs(pos % tamano - (pieza - 1) % tamano)
+             for pos in range(self.casillas)]
+            for pieza in range(1, self.casillas)
+        ]
+
+    def _movimientos_desde(self, pos: int) -> List[Tuple[str, int]]:
+        fila, col = pos // self.tamano, pos % self.tamano
+        movimientos = []
+        for mov, (d_fila, d_col) in DIRECCIONES.items():
+            if 0 <= fila + d_fila < self.tamano and 0 <= col + d_col < self.tamano:
+                movimientos.append((mov, pos + d_fila * self.tamano + d_col))
+        return movimientos
+
+    def codificar(self, tablero: List[int]) -> int:
+        """Empaqueta la lista de casillas en un entero"""
+        codigo = 0
+        for i, valor in enumerate(tablero):
+            codigo |= valor << (self.bits * i)
+        return codigo
+
+    def decodificar(self, codigo: int) -> List[int]:
+        """Desempaqueta un entero en la lista de casillas"""
+        return [(codigo >> (self.bits * i)) & self.mascara for i in range(self.casillas)]
+
+    def mover(self, codigo: int, pos_vacia: int, nueva_pos: int) -> int:
+        """Desliza la pieza de nueva_pos hacia el vacío sin desempaquetar el tablero"""
+        desplazamiento = self.bits * nueva_pos
+        pieza = (codigo >> desplazamiento) & self.mascara
+        return codigo - (pieza << desplazamiento) + (pieza << (self.bits * pos_vacia))
+
+    def heuristica(self, codigo: int) -> int:
+        """Heurística Manhattan calculada directamente sobre el entero"""
+        distancia = 0
+        for i in range(self.casillas):
+            pieza = (codigo >> (self.bits * i)) & self.mascara
+            distancia += self.distancias_manhattan[pieza][i]
+        return distancia
+
+_GEOMETRIAS: Dict[int, GeometriaTablero] = {}
+
+def obtener_geometria(tamano: int) -> GeometriaTablero:
+    """Devuelve (y guarda en caché) la geometría del tablero de tamano x tamano"""
+    if tamano not in _GEOMETRIAS:
+        _GEOMETRIAS[tamano] = GeometriaTablero(tamano)
+    return _GEOMETRIAS[tamano]
+
+GEOMETRIA_3X3 = obtener_geometria(3)
+
+# ========== COMPROBACIÓN DE RESOLUBILIDAD ==========
+def contar_inversiones(piezas: List[int]) -> int:
+    """Número de pares fuera de orden, en O(n log n) con un árbol de Fenwick"""
+    arbol = [0] * (len(piezas) + 2)
+    inversiones = 0
+    # Se recorre de derecha a izquierda contando cuántas piezas menores ya se vieron
+    for valor in reversed(piezas):
+        i = valor - 1
+        while i > 0:
+            inversiones += arbol[i]
+            i -= i & -i
+        i = valor
+        while i < len(arbol):
+            arbol[i] += 1
+            i += i & -i
+    return inversiones
+
+def es_resoluble(tablero: List[int]) -> bool:
+    """
+    Invariante de paridad: con ancho impar, las inversiones entre piezas deben ser pares;
+    con ancho par, inversiones + filas que separan el vacío de la última fila deben ser pares.
+    """
+    tamano = math.isqrt(len(tablero))
+    inversiones = contar_inversiones([valor for valor in tablero if valor != 0])
+    if tamano % 2 == 1:
+        return inversiones % 2 == 0
+    filas_hasta_abajo = tamano - 1 - tablero.index(0) // tamano
+    return (inversiones + filas_hasta_abajo) % 2 == 0
+
+# ========== CLASE ESTADOPUZZLE8 ==========
+class EstadoPuzzle8:
+    __slots__ = ("codigo", "pos_vacia", "geometria", "padre", "movimiento", "profundidad")
+
+    def __init__(self, tablero: List[int], padre=None, movimiento="", profundidad=0):
+        tamano = math.isqrt(len(tablero))
+        if tamano * tamano != len(tablero) or sorted(tablero) != list(range(len(tablero))):
+            raise ValueError(f"Tablero inválido: {tablero}")
+        self.geometria = obtener_geometria(tamano)
+        self.codigo = self.geometria.codificar(tablero)
+        self.pos_vacia = tablero.index(0)
+        self.padre = padre   
+        self.movimiento = movimiento  
+        self.profundidad = profundidad  # g(n) - costo real desde el inicio
+
+    @classmethod
+    def desde_codigo(cls, codigo: int, pos_vacia: int, padre=None, movimiento="", profundidad=0,
+                     geometria: GeometriaTablero = GEOMETRIA_3X3) -> 'EstadoPuzzle8':
+        """Construye un estado a partir del entero empaquetado, sin pasar por la lista"""
+        estado = cls.__new__(cls)
+        estado.codigo = codigo
+        estado.pos_vacia = pos_vacia
+        estado.geometria = geometria
+        estado.padre = padre
+        estado.movimiento = movimiento
+        estado.profundidad = profundidad
+        return estado
+
+    @property
+    def tablero(self) -> List[int]:
+        return self.geometria.decodificar(self.codigo)
+
+    def __eq__(self, otro):
+        return self.codigo == otro.codigo and self.geometria is otro.geometria
+    
+    def __hash__(self):
+        return hash(self.codigo)
+    
+    # IMPLEMENTACIÓN DE A*: Función de evaluación f(n) = g(n) + h(n)
+    def __lt__(self, otro):
+        """
+        - g(n): profundidad (costo real desde el inicio)
+        - h(n): heurística Manhattan
+        """
+        return (self.profundidad + self.heuristica()) < (otro.profundidad + otro.heuristica())
+    
+    # heurística Manhattan
+    def heuristica(self) -> int:
+        return self.geometria.heuristica(self.codigo)
+    
+    def es_objetivo(self) -> bool:
+        return self.codigo == self.geometria.codigo_objetivo # estado objetivo
+    
+    def obtener_movimientos_posibles(self) -> List[str]:
+        return [mov for mov, _ in self.geometria.movimientos_por_posicion[self.pos_vacia]]
+    
+    def realizar_movimiento(self, direccion: str) -> Optional['EstadoPuzzle8']:
+        """Genera un nuevo estado aplicando un movimiento"""
+        for mov, nueva_pos in self.geometria.movimientos_por_posicion[self.pos_vacia]:
+            if mov == direccion:
+                # Intercambia la pieza con el espacio vacío
+                nuevo_codigo = self.geometria.mover(self.codigo, self.pos_vacia, nueva_pos)
+                return EstadoPuzzle8.desde_codigo(nuevo_codigo, nueva_pos, self, direccion,
+                                                  self.profundidad + 1, self.geometria)
+        return None
+
+# ========== TABLA DE DISTANCIAS EXACTAS ==========
+FACTORIALES = [1, 1, 2, 6, 24, 120, 720, 5040, 40320, 362880]
+# Solo la mitad de las 9! permutaciones es alcanzable desde el objetivo
+ESTADOS_RESOLUBLES = FACTORIALES[9] // 2
+NO_ALCANZABLE = 0xFF
+RUTA_TABLA_DISTANCIAS = os.path.join(DIRECTORIO_MODULO, "distancias_puzzle8.bin")
+
+def escribir_atomico(ruta: str, *partes: bytes):
+    """Escribe a un temporal y lo renombra: otro proceso nunca mapea un archivo a medias"""
+    temporal = ruta + ".tmp"
+    try:
+        with open(temporal, "wb") as f:
+            for parte in partes:
+                f.write(parte)
+        os.replace(temporal, ruta)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporal)
+        raise
+
+def rango_permutacion(tablero: List[int]) -> int:
+    """Rango lexicográfico (código de Lehmer) de la permutación, en [0, 9!)"""
+    rango = 0
+    n = len(tablero)
+    for i in range(n - 1):
+        valor = tablero[i]
+        menores = 0
+        for j in range(i + 1, n):
+            if tablero[j] < valor:
+                menores += 1
+        rango += menores * FACTORIALES[n - 1 - i]
+    return rango
+
+def indice_estado(tablero: List[int]) -> int:
+    """Índice en [0, 181440): posición del vacío * 8!/2 + rango de las 8 piezas // 2"""
+    piezas = [valor for valor in tablero if valor != 0]
+    return tablero.index(0) * (FACTORIALES[8] // 2) + rango_permutacion(piezas) // 2
+
+class TablaDistanciasPuzzle8:
+    """
+    Distancia exacta al objetivo de los 181,440 estados resolubles, un byte por estado.
+    Dos órdenes de piezas que solo difieren en las dos últimas comparten rango // 2 y
+    tienen paridad distinta, así que entre los resolubles indice_estado es único.
+    El archivo se genera una sola vez con una BFS hacia atrás y se lee con mmap.
+    """
+    MAGIA = b"P8DT"
+    VERSION = 1
+    CABECERA = struct.Struct("<4sHII")  # magia, versión, número de estados, crc32
+
+    def __init__(self, ruta: str = RUTA_TABLA_DISTANCIAS):
+        self.ruta = ruta
+        self._datos = None  # se carga de forma perezosa en la primera consulta
+
+    def construir(self) -> bytearray:
+        """BFS desde el objetivo; los movimientos son reversibles, así que da la distancia exacta"""
+        distancias = bytearray([NO_ALCANZABLE]) * ESTADOS_RESOLUBLES
+        geometria = GEOMETRIA_3X3
+        distancias[indice_estado(geometria.objetivo)] = 0
+        frontera = deque([(geometria.codigo_objetivo, geometria.objetivo.index(0), 0)])
+        while frontera:
+            codigo, pos_vacia, distancia = frontera.popleft()
+            for _, nueva_pos in geometria.movimientos_por_posicion[pos_vacia]:
+                siguiente = geometria.mover(codigo, pos_vacia, nueva_pos)
+                indice = indice_estado(geometria.decodificar(siguiente))
+                if distancias[indice] == NO_ALCANZABLE:
+                    distancias[indice] = distancia + 1
+                    frontera.append((siguiente, nueva_pos, distancia + 1))
+
+        cabecera = self.CABECERA.pack(self.MAGIA, self.VERSION, ESTADOS_RESOLUBLES, zlib.crc32(distancias))
+        try:
+            escribir_atomico(self.ruta, cabecera, distancias)
+        except OSError as e:
+            # Sin archivo la tabla se usa igual desde memoria; se reconstruirá la próxima vez
+            print(f"No se pudo guardar la tabla de distancias ({e}); se usa solo en memoria",
+                  file=sys.stderr)
+        return distancias
+
+    def cargar(self):
+        """Mapea el archivo en memoria y valida cabecera y checksum; si falta o no es válido lo reconstruye"""
+        if os.path.exists(self.ruta):
+            tamano_cabecera = self.CABECERA.size
+            # Un archivo vacío o truncado no se llega a mapear (mmap rechaza los vacíos)
+            if os.path.getsize(self.ruta) == tamano_cabecera + ESTADOS_RESOLUBLES:
+                with open(self.ruta, "rb") as f:
+                    datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magia, version, estados, crc = self.CABECERA.unpack_from(datos, 0)
+                cuerpo = memoryview(datos)[tamano_cabecera:]
+                if (magia, version, estados) == (self.MAGIA, self.VERSION, ESTADOS_RESOLUBLES) and zlib.crc32(cuerpo) == crc:
+                    self._datos = cuerpo
+                    return
+                cuerpo.release()
+                datos.close()
+            print(f"Tabla de distancias inválida, se reconstruye: {self.ruta}", file=sys.stderr)
+        self._datos = self.construir()
+
+    def distancia(self, tablero: List[int]) -> Optional[int]:
+        """Número mínimo de movimientos hasta el objetivo, o None si el tablero no es resoluble"""
+        if not es_resoluble(tablero):
+            return None
+        if self._datos is None:
+            self.cargar()
+        return self._datos[indice_estado(tablero)]
+
+    def distancia_codigo(self, codigo: int) -> int:
+        """Consulta sin comprobar paridad, para estados alcanzados desde uno resoluble"""
+        if self._datos is None:
+            self.cargar()
+        return self._datos[indice_estado(GEOMETRIA_3X3.decodificar(codigo))]
+
+# Instancia compartida; no lee el archivo hasta la primera consulta
+TABLA_DISTANCIAS = TablaDistanciasPuzzle8()
+
+# ========== BASES DE PATRONES ADITIVAS ==========
+# Particiones disjuntas de las piezas; cada grupo tiene su propia base de patrones.
+# El índice de un grupo es sum(pos(pieza_i) * casillas**i), así que la tabla ocupa
+# casillas**k bytes y mover una pieza cambia el índice en una sola suma.
+PARTICIONES_PREDETERMINADAS = {
+    3: [[1, 2, 3, 4], [5, 6, 7, 8]],
+    4: [[1, 2, 3, 5, 6], [4, 7, 8, 11, 12], [9, 10, 13, 14, 15]],
+    5: [[1, 2, 6, 7], [3, 4, 8, 9], [5, 10, 15, 20], [11, 12, 16, 17], [13, 14, 18, 19], [21, 22, 23, 24]],
+}
+
+class BasePatronesAditiva:
+    """
+    Heurística de bases de patrones disjuntas: cada tabla guarda el mínimo número de
+    movimientos de las piezas de su grupo (las demás piezas son indistinguibles y
+    moverlas no cuesta), por lo que la suma de todos los grupos sigue siendo admisible.
+    Las tablas se generan fuera de línea con construir() y se leen con mmap.
+    """
+    MAGIA = b"PDBA"
+    VERSION = 1
+    CABECERA = struct.Struct("<4sHBB32sII")  # magia, versión, tamaño, nº piezas, piezas, entradas, crc32
+
+    def __init__(self, tamano: int, particion: Optional[List[List[int]]] = None,
+                 directorio: str = DIRECTORIO_MODULO):
+        self.geometria = obtener_geometria(tamano)
+        self.particion = particion or PARTICIONES_PREDETERMINADAS[tamano]
+        self.directorio = directorio
+        self.tablas = None  # se cargan de forma perezosa
+
+        # grupo_de[pieza]: grupo al que pertenece (-1 si ninguno); peso[pieza]: casillas**i en su grupo
+        casillas = self.geometria.casillas
+        self.grupo_de = [-1] * casillas
+        self.peso = [0] * casillas
+        for grupo, piezas in enumerate(self.particion):
+            for i, pieza in enumerate(piezas):
+                if not 0 < pieza < casillas or self.grupo_de[pieza] != -1:
+                    raise ValueError(f"Partición inválida para {tamano}x{tamano}: {self.particion}")
+                self.grupo_de[pieza] = grupo
+                self.peso[pieza] = casillas ** i
+
+    def ruta_grupo(self, piezas: List[int]) -> str:
+        tamano = self.geometria.tamano
+        return os.path.join(self.directorio, f"patrones_{tamano}x{tamano}_{'-'.join(map(str, piezas))}.bin")
+
+    def construir(self):
+        """Genera y guarda la tabla de cada grupo de la partición"""
+        for piezas in self.particion:
+            inicio = time.time()
+            tabla = self._construir_grupo(piezas)
+            cabecera = self.CABECERA.pack(self.MAGIA, self.VERSION, self.geometria.tamano, len(piezas),
+                                          bytes(piezas), len(tabla), zlib.crc32(tabla))
+            # Las bases grandes tardan minutos: una construcción interrumpida no deja un archivo a medias
+            escribir_atomico(self.ruta_grupo(piezas), cabecera, tabla)
+            print(f"Patrón {piezas}: {len(tabla)} entradas en {time.time() - inicio:.1f} s")
+
+    def _construir_grupo(self, piezas: List[int]) -> bytes:
+        """
+        BFS 0-1 hacia atrás desde el objetivo sobre (posiciones del grupo, posición del vacío).
+        Mover una pieza del grupo cuesta 1; mover cualquier otra cuesta 0.
+        """
+        geometria = self.geometria
+        casillas = geometria.casillas
+        potencias = [casillas ** i for i in range(len(piezas))]
+        entradas = casillas ** len(piezas)
+        # El vacío ocupa el dígito más significativo del índice
+        distancias = bytearray([NO_ALCANZABLE]) * (entradas * casillas)
+        inicio = sum((pieza - 1) * potencia for pieza, potencia in zip(piezas, potencias))
+        inicio += geometria.objetivo.index(0) * entradas
+        distancias[inicio] = 0
+        cola = deque([inicio])
+
+        while cola:
+            indice = cola.popleft()
+            distancia = distancias[indice]
+            pos_vacia, resto = divmod(indice, entradas)
+            posiciones = []
+            for _ in piezas:
+                resto, pos = divmod(resto, casillas)
+                posiciones.append(pos)
+
+            for _, nueva_pos in geometria.movimientos_por_posicion[pos_vacia]:
+                salto_vacio = (nueva_pos - pos_vacia) * entradas
+                if nueva_pos in posiciones:
+                    i = posiciones.index(nueva_pos)
+                    siguiente = indice + salto_vacio + (pos_vacia - nueva_pos) * potencias[i]
+                    if distancia + 1 < distancias[siguiente]:
+                        distancias[siguiente] = distancia + 1
+                        cola.append(siguiente)
+                else:
+                    siguiente = indice + salto_vacio
+                    if distancia < distancias[siguiente]:
+                        distancias[siguiente] = distancia
+                        cola.appendleft(siguiente)
+
+        # La heurística no conoce la posición del vacío: se queda con el mínimo
+        bloques = [distancias[pos * entradas:(pos + 1) * entradas] for pos in range(casillas)]
+        return bytes(map(min, zip(*bloques)))
+
+    def cargar(self):
+        """Mapea en memoria las tablas de todos los grupos y valida cabecera y checksum"""
+        tablas = []
+        for piezas in self.particion:
+            ruta = self.ruta_grupo(piezas)
+            if not os.path.exists(ruta):
+                tamano = self.geometria.tamano
+                raise FileNotFoundError(
+                    f"No existe {ruta}; genérala con: python puzzle8.py --construir-patrones {tamano}"
+                )
+            # mmap rechaza los archivos vacíos y unpack_from los más cortos que la cabecera
+            if os.path.getsize(ruta) < self.CABECERA.size:
+                raise ValueError(f"Base de patrones inválida o corrupta: {ruta}")
+            with open(ruta, "rb") as f:
+                datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magia, version, tamano, k, guardadas, entradas, crc = self.CABECERA.unpack_from(datos, 0)
+            cuerpo = memoryview(datos)[self.CABECERA.size:]
+            valida = (
+                (magia, version, tamano, k) == (self.MAGIA, self.VERSION, self.geometria.tamano, len(piezas))
+                and list(guardadas[:k]) == list(piezas)
+                and len(cuerpo) == entradas == self.geometria.casillas ** k
+                and zlib.crc32(cuerpo) == crc
+            )
+            if not valida:
+                cuerpo.release()
+                datos.close()
+                raise ValueError(f"Base de patrones inválida o corrupta: {ruta}")
+            tablas.append(cuerpo)
+        self.tablas = tablas
+
+    def indices_codigo(self, codigo: int) -> List[int]:
+        """Índice de cada grupo para un tablero empaquetado"""
+        geometria = self.geometria
+        indices = [0] * len(self.particion)
+        for pos in range(geometria.casillas):
+            pieza = (codigo >> (geometria.bits * pos)) & geometria.mascara
+            grupo = self.grupo_de[pieza]
+            if grupo >= 0:
+                indices[grupo] += pos * self.peso[pieza]
+        return indices
+
+    def evaluar(self, indices: List[int]) -> int:
+        if self.tablas is None:
+            self.cargar()
+        return sum(tabla[indice] for tabla, indice in zip(self.tablas, indices))
+
+    def actualizar(self, h: int, indices: Tuple[int, ...], pieza: int, desde: int, hacia: int) -> Tuple[int, Tuple[int, ...]]:
+        """Solo cambia el término del grupo de la pieza que se desliza de desde a hacia"""
+        grupo = self.grupo_de[pieza]
+        if grupo < 0:
+            return h, indices
+        tabla = self.tablas[grupo]
+        viejo = indices[grupo]
+        nuevo = viejo + (hacia - desde) * self.peso[pieza]
+        nuevos = indices[:grupo] + (nuevo,) + indices[grupo + 1:]
+        return h - tabla[viejo] + tabla[nuevo], nuevos
+
+# ========== CACHÉ DE SOLUCIONES ==========
+RUTA_CACHE_SOLUCIONES = os.path.join(DIRECTORIO_MODULO, "cache_soluciones.json")
+
+class CacheSoluciones:
+    """
+    Caché LRU de soluciones óptimas: para cada estado de un camino óptimo guarda su
+    distancia exacta al objetivo y el siguiente movimiento. Todo sufijo de un camino
+    óptimo es óptimo, así que una búsqueda que llega a un estado guardado puede
+    terminar ahí y empalmar el resto. Hay una tabla por tamaño de tablero y la
+    capacidad se aplica a cada una.
+    """
+    VERSION = 1
+
+    def __init__(self, capacidad: int = 200000, ruta: Optional[str] = None):
+        if capacidad <= 0:
+            raise ValueError(f"La capacidad debe ser positiva: {capacidad}")
+        self.capacidad = capacidad
+        self.ruta = ruta
+        # tamaño -> OrderedDict codigo -> (distancia, movimiento); el final es lo más reciente
+        self.tablas: Dict[int, "OrderedDict[int, Tuple[int, str]]"] = {}
+        self.aciertos = 0
+        # Entradas nuevas o cambiadas desde la última vez que se cargó o guardó el archivo
+        self.sin_guardar = 0
+        if ruta is not None and os.path.exists(ruta):
+            self.cargar()
+
+    def __len__(self):
+        return sum(len(tabla) for tabla in self.tablas.values())
+
+    def tabla(self, geometria: GeometriaTablero) -> "OrderedDict[int, Tuple[int, str]]":
+        if geometria.tamano not in self.tablas:
+            self.tablas[geometria.tamano] = OrderedDict()
+        return self.tablas[geometria.tamano]
+
+    def registrar(self, geometria: GeometriaTablero, codigo: int, pos_vacia: int, camino: List[str]):
+        """Guarda cada estado del camino óptimo que parte de (codigo, pos_vacia)"""
+        tabla = self.tabla(geometria)
+        for i, mov in enumerate(camino):
+            entrada = (len(camino) - i, mov)
+            if tabla.get(codigo) != entrada:
+                tabla[codigo] = entrada
+                self.sin_guardar += 1
+            tabla.move_to_end(codigo)
+            nueva_pos = self._destino(geometria, pos_vacia, mov)
+            codigo, pos_vacia = geometria.mover(codigo, pos_vacia, nueva_pos), nueva_pos
+        while len(tabla) > self.capacidad:
+            tabla.popitem(last=False)
+
+    def sufijo(self, geometria: GeometriaTablero, codigo: int, pos_vacia: int) -> Optional[List[str]]:
+        """
+        Camino óptimo guardado desde el estado hasta el objetivo, o None si el estado no
+        está o su cadena quedó incompleta porque el LRU desalojó algún eslabón.
+        """
+        tabla = self.tablas.get(geometria.tamano)
+        if not tabla or codigo not in tabla:
+            return None
+        camino = []
+        eslabones = []
+        distancia = tabla[codigo][0]
+        while codigo != geometria.codigo_objetivo:
+            entrada = tabla.get(codigo)
+            if entrada is None or entrada[0] != distancia:
+                return None
+            eslabones.append(codigo)
+            camino.append(entrada[1])
+            nueva_pos = self._destino(geometria, pos_vacia, entrada[1])
+            codigo, pos_vacia, distancia = geometria.mover(codigo, pos_vacia, nueva_pos), nueva_pos, distancia - 1
+        for eslabon in eslabones:
+            tabla.move_to_end(eslabon)
+        self.aciertos += 1
+        return camino
+
+    @staticmethod
+    def _destino(geometria: GeometriaTablero, pos_vacia: int, movimiento: str) -> int:
+        for mov, nueva_pos in geometria.movimientos_por_posicion[pos_vacia]:
+            if mov == movimiento:
+                return nueva_pos
+        raise ValueError(f"Movimiento {movimiento} imposible desde la casilla {pos_vacia}")
+
+    def guardar(self, ruta: Optional[str] = None):
+        """Escribe la caché en JSON (de lo menos a lo más reciente) de forma atómica"""
+        ruta = ruta or self.ruta
+        if ruta is None:
+            raise ValueError("No se indicó la ruta de la caché")
+        datos = {
+            "version": self.VERSION,
+            "tablas": {str(tamano): [[codigo, distancia, mov] for codigo, (distancia, mov) in tabla.items()]
+                       for tamano, tabla in self.tablas.items()},
+        }
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, separators=(",", ":"))
+        os.replace(temporal, ruta)
+        self.sin_guardar = 0
+
+    def cargar(self, ruta: Optional[str] = None):
+        """Lee una caché guardada; un archivo ilegible o de otra versión se ignora"""
+        ruta = ruta or self.ruta
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+            if datos.get("version") != self.VERSION:
+                raise ValueError(datos.get("version"))
+            tablas = {
+                int(tamano): OrderedDict((codigo, (distancia, mov)) for codigo, distancia, mov in entradas)
+                for tamano, entradas in datos["tablas"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Caché de soluciones {ruta} ignorada: {e}")
+            return
+        for tabla in tablas.values():
+            while len(tabla) > self.capacidad:
+                tabla.popitem(last=False)
+        self.tablas = tablas
+        self.sin_guardar = 0
+
+# ========== CLASE SOLUCIONADORPUZZLE8 ==========
+# Políticas de desempate entre nodos con el mismo f(n)
+POLITICAS_DESEMPATE = ("mayor_g", "menor_g", "fifo", "lifo")
+# Valores centinela de IDA*
+ENCONTRADO = -1
+INFINITO = float("inf")
+# Cada cuántos nodos se publica el progreso y se revisan cancelación y tiempo
+INTERVALO_CONTROL = 1024
+
+class BusquedaInterrumpida(Exception):
+    """Se lanza cuando la búsqueda se cancela o agota su presupuesto de nodos o de tiempo"""
+    def __init__(self, motivo: str, progreso: dict):
+        super().__init__(f"Búsqueda interrumpida ({motivo}) tras {progreso['explorados']} estados explorados")
+        self.motivo = motivo
+        self.progreso = progreso
+
+class MonticuloContado:
+    """
+    heappush y heappop con el mismo algoritmo que heapq, contando las comparaciones.
+    Es más lento que heapq (está en Python): solo se usa para medir.
+    """
+    def __init__(self):
+        self.comparaciones = 0
+
+    def heappush(self, heap: list, item):
+        heap.append(item)
+        self._subir(heap, 0, len(heap) - 1)
+
+    def heappop(self, heap: list):
+        ultimo = heap.pop()
+        if not heap:
+            return ultimo
+        primero = heap[0]
+        heap[0] = ultimo
+        self._bajar(heap, 0)
+        return primero
+
+    def _subir(self, heap: list, inicio: int, pos: int):
+        nuevo = heap[pos]
+        while pos > inicio:
+            padre = (pos - 1) >> 1
+            self.comparaciones += 1
+            if not nuevo < heap[padre]:
+                break
+            heap[pos] = heap[padre]
+            pos = padre
+        heap[pos] = nuevo
+
+    def _bajar(self, heap: list, pos: int):
+        # Como heapq._siftup: baja hasta una hoja por el hijo menor y luego sube
+        fin, inicio, nuevo = len(heap), pos, heap[pos]
+        hijo = 2 * pos + 1
+        while hijo < fin:
+            derecho = hijo + 1
+            if derecho < fin:
+                self.comparaciones += 1
+                if not heap[hijo] < heap[derecho]:
+                    hijo = derecho
+            heap[pos] = heap[hijo]
+            pos = hijo
+            hijo = 2 * pos + 1
+        heap[pos] = nuevo
+        self._subir(heap, inicio, pos)
+
+class SolucionadorPuzzle8:
+    def __init__(self, desempate: str = "mayor_g", tabla_distancias: Optional[TablaDistanciasPuzzle8] = None,
+                 patrones: Optional[BasePatronesAditiva] = None, limite_nodos: Optional[int] = None,
+                 limite_tiempo: Optional[float] = None, cache: Optional[CacheSoluciones] = None,
+                 medir_comparaciones: bool = False):
+        if desempate not in POLITICAS_DESEMPATE:
+            raise ValueError(f"Política de desempate desconocida: {desempate}")
+        self.desempate = desempate
+        # Si se indica, A* usa la distancia exacta de la tabla como heurística perfecta
+        self.tabla_distancias = tabla_distancias
+        # Si se indica, A* e IDA* usan la base de patrones aditiva en lugar de Manhattan
+        self.patrones = patrones
+        # Presupuestos opcionales: al agotarse se lanza BusquedaInterrumpida
+        self.limite_nodos = limite_nodos
+        self.limite_tiempo = limite_tiempo
+        # Si se indica, las soluciones óptimas se memorizan y sus sufijos se reutilizan
+        self.cache = cache
+        # Si es True, A* cuenta las comparaciones del heap para calcular evaluaciones_ahorradas (más lento)
+        self.medir_comparaciones = medir_comparaciones
+        self.estadisticas = {}
+        # Progreso publicado para otro hilo: {"explorados", "f", "transcurrido"}
+        self.progreso = {"explorados": 0, "f": 0, "transcurrido": 0.0}
+        self._cancelacion = threading.Event()
+        self._inicio = 0.0
+
+    def cancelar(self):
+        """Pide a la búsqueda en curso (en otro hilo) que se detenga en el siguiente control"""
+        self._cancelacion.set()
+
+    def _iniciar_control(self) -> int:
+        """Reinicia cancelación y progreso; devuelve en qué nodo toca el primer control"""
+        self._cancelacion.clear()
+        self._inicio = time.perf_counter()
+        self.progreso = {"explorados": 0, "f": 0, "transcurrido": 0.0}
+        if self.limite_nodos is not None:
+            return min(INTERVALO_CONTROL, self.limite_nodos)
+        return INTERVALO_CONTROL
+
+    def _controlar(self, explorados: int, f: int) -> int:
+        """Publica el progreso y aplica cancelación y presupuestos; devuelve el próximo control"""
+        transcurrido = time.perf_counter() - self._inicio
+        self.progreso = {"explorados": explorados, "f": f, "transcurrido": transcurrido}
+        if self._cancelacion.is_set():
+            raise BusquedaInterrumpida("cancelada", self.progreso)
+        if self.limite_nodos is not None and explorados >= self.limite_nodos:
+            raise BusquedaInterrumpida("límite de nodos", self.progreso)
+        if self.limite_tiempo is not None and transcurrido >= self.limite_tiempo:
+            raise BusquedaInterrumpida("límite de tiempo", self.progreso)
+        proximo = explorados + INTERVALO_CONTROL
+        if self.limite_nodos is not None:
+            proximo = min(proximo, self.limite_nodos)
+        return proximo
+
+    def _clave_desempate(self, g: int, h: int, contador: int) -> int:
+        if self.desempate == "mayor_g":
+            return h  # con f fijo, menor h equivale a mayor g
+        if self.desempate == "menor_g":
+            return g
+        if self.desempate == "fifo":
+            return contador
+        return -contador
+
+    def _heuristicas(self, geometria: GeometriaTablero) -> Tuple[Optional[TablaDistanciasPuzzle8], Optional[BasePatronesAditiva]]:
+        """Valida que la tabla o la base de patrones configuradas correspondan al tamaño del tablero"""
+        tabla, patrones = self.tabla_distancias, self.patrones
+        if tabla is not None and geometria is not GEOMETRIA_3X3:
+            raise ValueError("La tabla de distancias exactas solo cubre el tablero de 3x3")
+        if patrones is not None:
+            if patrones.geometria is not geometria:
+                raise ValueError(f"La base de patrones es de {patrones.geometria.tamano}x{patrones.geometria.tamano}")
+            if patrones.tablas is None:
+                patrones.cargar()
+        return tabla, patrones
+
+    def _desde_cache(self, estado: EstadoPuzzle8) -> Optional[List[str]]:
+        if self.cache is None:
+            return None
+        return self.cache.sufijo(estado.geometria, estado.codigo, estado.pos_vacia)
+
+    def _memorizar(self, estado: EstadoPuzzle8, camino: Optional[List[str]]):
+        """Solo se memorizan caminos óptimos"""
+        if self.cache is not None and camino:
+            self.cache.registrar(estado.geometria, estado.codigo, estado.pos_vacia, camino)
+
+    def resolver(self, estado_inicial: EstadoPuzzle8, peso: float = 1.0) -> Tuple[Optional[List[str]], int]:
+        """
+        A* ponderado: f(n) = g(n) + peso * h(n). Con peso 1 es A* óptimo; con peso > 1
+        suele expandir muchos menos nodos y la solución mide a lo sumo peso veces la óptima.
+        """
+        if peso < 1:
+            raise ValueError(f"El peso debe ser >= 1: {peso}")
+        if peso == 1:
+            # Con el entero, f de A* normal sigue siendo entera (27 y no 27.0 en el progreso)
+            peso = 1
+        self.estadisticas = {"evaluaciones_completas": 0, "actualizaciones_incrementales": 0,
+                             "comparaciones_heap": None, "evaluaciones_ahorradas": None, "inserciones": 0, "pico_abiertos": 0, "duplicados_descartados": 0,
+                             "cota_suboptimalidad": peso, "acierto_cache": False}
+        # Un tablero irresoluble se rechaza antes de buscar: camino None en lugar de []
+        if not es_resoluble(estado_inicial.tablero):
+            return None, 0
+        if estado_inicial.es_objetivo():
+            return [], 0
+        camino = self._desde_cache(estado_inicial)
+        if camino is not None:
+            self.estadisticas["acierto_cache"] = True
+            self.estadisticas["cota_suboptimalidad"] = 1.0
+            return camino, 0
+        
+        geometria = estado_inicial.geometria
+        movimientos_por_posicion = geometria.movimientos_por_posicion
+        distancias_manhattan = geometria.distancias_manhattan
+        bits, mascara = geometria.bits, geometria.mascara
+        tabla, patrones = self._heuristicas(geometria)
+        inicio = estado_inicial.codigo
+        indices_inicio = None
+        if tabla is not None:
+            h_inicio = tabla.distancia(estado_inicial.tablero)
+        elif patrones is not None:
+            indices_inicio = tuple(patrones.indices_codigo(inicio))
+            h_inicio = patrones.evaluar(indices_inicio)
+        else:
+            # h(n) se calcula completo solo para el nodo inicial; el resto se actualiza desde el padre
+            h_inicio = geometria.heuristica(inicio)
+        self.estadisticas["evaluaciones_completas"] = 1
+        monticulo = MonticuloContado() if self.medir_comparaciones else None
+        heappush, heappop = (monticulo.heappush, monticulo.heappop) if monticulo else (heapq.heappush, heapq.heappop)
+        clave = self._clave_desempate
+        contador = 0
+        # Los nodos abiertos son tuplas precalculadas:
+        # (f, desempate, g, h, codigo, pos_vacia, codigo_padre, movimiento, índices de los patrones)
+        abiertos = [(peso * h_inicio, clave(0, h_inicio, contador), 0, h_inicio, inicio, estado_inicial.pos_vacia,
+                     None, "", indices_inicio)]
+        # Conjunto cerrado y tabla de padres a la vez: codigo -> (codigo_padre, movimiento)
+        cerrados: Dict[int, Tuple[Optional[int], str]] = {}
+        # Mejor g conocido de cada estado generado: un duplicado que no mejora g no se inserta.
+        # Si mejora, la entrada vieja queda en el heap y se descarta al salir (decrease-key perezoso).
+        mejor_g: Dict[int, int] = {inicio: 0}
+        # Estados generados que están en la caché -> sufijo óptimo hasta el objetivo.
+        # Su h es la distancia exacta: si uno sale del heap, empalmar su sufijo es óptimo.
+        tabla_cache = self.cache.tabla(geometria) if self.cache is not None else None
+        sufijos: Dict[int, List[str]] = {}
+        pico_abiertos, descartados = 1, 0
+        explorados = 0
+        proximo_control = self._iniciar_control()
+
+        while abiertos:
+            # A*: Selecciona el nodo con menor f(n) = g(n) + h(n)
+            f, _, g, h, codigo, pos_vacia, padre, movimiento, indices = heappop(abiertos)
+            
+            if codigo in cerrados:
+                continue
+                
+            cerrados[codigo] = (padre, movimiento)
+            explorados += 1
+            
+            # Verifica si llegamos al objetivo o a un estado con solución memorizada
+            if codigo == geometria.codigo_objetivo or codigo in sufijos:
+                self._registrar_incrementales(0 if tabla is not None else contador, monticulo)
+                self._registrar_abiertos(contador + 1, pico_abiertos, descartados)
+                camino = self._reconstruir_camino(cerrados, codigo) + sufijos.get(codigo, [])
+                self.estadisticas["acierto_cache"] = codigo in sufijos
+                if peso == 1:
+                    self._memorizar(estado_inicial, camino)
+                return camino, explorados
+            if explorados >= proximo_control:
+                proximo_control = self._controlar(explorados, f)
+            
+            g_siguiente = g + 1
+            for mov, nueva_pos in movimientos_por_posicion[pos_vacia]:
+                desplazamiento = bits * nueva_pos
+                pieza = (codigo >> desplazamiento) & mascara
+                siguiente = codigo - (pieza << desplazamiento) + (pieza << (bits * pos_vacia))
+                g_anterior = mejor_g.get(siguiente)
+                if g_anterior is not None and g_anterior <= g_siguiente:
+                    descartados += 1
+                else:
+                    mejor_g[siguiente] = g_siguiente
+                    indices_siguiente = None
+                    if tabla is not None:
+                        h_siguiente = tabla.distancia_codigo(siguiente)
+                        self.estadisticas["evaluaciones_completas"] += 1
+                    elif patrones is not None:
+                        h_siguiente, indices_siguiente = patrones.actualizar(h, indices, pieza, nueva_pos, pos_vacia)
+                    else:
+                        # Solo cambia la distancia Manhattan de la pieza que se desliza al vacío
+                        distancias = distancias_manhattan[pieza]
+                        h_siguiente = h - distancias[nueva_pos] + distancias[pos_vacia]
+                    if siguiente in sufijos:
+                        h_siguiente = len(sufijos[siguiente])
+                    elif tabla_cache and siguiente in tabla_cache:
+                        sufijo = self.cache.sufijo(geometria, siguiente, nueva_pos)
+                        if sufijo is not None:
+                            sufijos[siguiente] = sufijo
+                            h_siguiente = len(sufijo)
+                    contador += 1
+                    heappush(abiertos, (
+                        g_siguiente + peso * h_siguiente, clave(g_siguiente, h_siguiente, contador),
+                        g_siguiente, h_siguiente, siguiente, nueva_pos, codigo, mov, indices_siguiente
+                    ))
+                    if len(abiertos) > pico_abiertos:
+                        pico_abiertos = len(abiertos)
+
+        self._registrar_incrementales(0 if tabla is not None else contador, monticulo)
+        self._registrar_abiertos(contador + 1, pico_abiertos, descartados)
+        return [], explorados
+
+    def _registrar_incrementales(self, actualizaciones: int, monticulo: Optional[MonticuloContado] = None):
+        """Cada actualización incremental sustituye un recorrido completo del tablero"""
+        self.estadisticas["actualizaciones_incrementales"] = actualizaciones
+        if monticulo is not None:
+            # El __lt__ anterior calculaba heuristica() de los dos estados en cada comparación
+            # del heap; ahora solo se calculan las evaluaciones completas
+            self.estadisticas["comparaciones_heap"] = monticulo.comparaciones
+            self.estadisticas["evaluaciones_ahorradas"] = (
+                2 * monticulo.comparaciones - self.estadisticas["evaluaciones_completas"]
+            )
+
+    def _registrar_abiertos(self, inserciones: int, pico_abiertos: int, descartados: int):
+        self.estadisticas["inserciones"] = inserciones
+        self.estadisticas["pico_abiertos"] = pico_abiertos
+        self.estadisticas["duplicados_descartados"] = descartados
+    
+    def _h_completa(self, geometria: GeometriaTablero, tabla: Optional[TablaDistanciasPuzzle8],
+                    patrones: Optional[BasePatronesAditiva], codigo: int) -> int:
+        if tabla is not None:
+            return tabla.distancia_codigo(codigo)
+        if patrones is not None:
+            return patrones.evaluar(patrones.indices_codigo(codigo))
+        return geometria.heuristica(codigo)
+
+    # IMPLEMENTACIÓN DE ARA*: A* ponderado anytime que reutiliza la búsqueda anterior
+    def resolver_anytime(self, estado_inicial: EstadoPuzzle8, peso_inicial: float = 3.0,
+                         decremento: float = 0.5) -> Tuple[Optional[List[str]], int]:
+        """
+        Encuentra rápido una solución con peso_inicial y la mejora bajando el peso hasta 1
+        mientras lo permita limite_tiempo. Los estados cuyo g mejora después de cerrarse
+        se guardan en `inconsistentes` y vuelven a la lista abierta en la siguiente pasada.
+        Devuelve la mejor solución encontrada; estadisticas["cota_suboptimalidad"] acota
+        cuántas veces más larga que la óptima puede ser.
+        """
+        if peso_inicial < 1 or decremento <= 0:
+            raise ValueError("Se requiere peso_inicial >= 1 y decremento > 0")
+        self.estadisticas = {"soluciones": [], "peso_final": peso_inicial, "cota_suboptimalidad": INFINITO}
+        if not es_resoluble(estado_inicial.tablero):
+            return None, 0
+        if estado_inicial.es_objetivo():
+            self.estadisticas["cota_suboptimalidad"] = 1.0
+            return [], 0
+
+        geometria = estado_inicial.geometria
+        tabla, patrones = self._heuristicas(geometria)
+        objetivo = geometria.codigo_objetivo
+        inicio = estado_inicial.codigo
+        g = {inicio: 0}
+        h = {inicio: self._h_completa(geometria, tabla, patrones, inicio)}
+        padres: Dict[int, Tuple[Optional[int], str]] = {inicio: (None, "")}
+        posiciones = {inicio: estado_inicial.pos_vacia}
+        peso = peso_inicial
+        contador = 0
+        # Entradas: (g + peso * h, desempate, g al insertar, codigo); una entrada con g viejo se descarta
+        abiertos = [(peso * h[inicio], self._clave_desempate(0, h[inicio], contador), 0, inicio)]
+        cerrados = set()
+        inconsistentes = set()
+        mejor_camino = None
+        explorados = 0
+        proximo_control = self._iniciar_control()
+
+        try:
+            while True:
+                # Mejorar el camino: expandir mientras algún abierto pueda dar algo mejor que g(objetivo)
+                while abiertos and abiertos[0][0] < g.get(objetivo, INFINITO):
+                    f, _, g_entrada, codigo = heapq.heappop(abiertos)
+                    if codigo in cerrados or g_entrada != g[codigo]:
+                        continue
+                    cerrados.add(codigo)
+                    explorados += 1
+                    if explorados >= proximo_control:
+                        proximo_control = self._controlar(explorados, f)
+
+                    pos_vacia = posiciones[codigo]
+                    g_siguiente = g_entrada + 1
+                    for mov, nueva_pos in geometria.movimientos_por_posicion[pos_vacia]:
+                        siguiente = geometria.mover(codigo, pos_vacia, nueva_pos)
+                        if g_siguiente >= g.get(siguiente, INFINITO):
+                            continue
+                        g[siguiente] = g_siguiente
+                        padres[siguiente] = (codigo, mov)
+                        posiciones[siguiente] = nueva_pos
+                        if siguiente not in h:
+                            h[siguiente] = self._h_completa(geometria, tabla, patrones, siguiente)
+                        if siguiente in cerrados:
+                            inconsistentes.add(siguiente)
+                        else:
+                            contador += 1
+                            heapq.heappush(abiertos, (
+                                g_siguiente + peso * h[siguiente],
+                                self._clave_desempate(g_siguiente, h[siguiente], contador), g_siguiente, siguiente
+                            ))
+
+                # Estados que aún podrían mejorar la solución en pasadas futuras
+                pendientes = {codigo for _, _, g_entrada, codigo in abiertos
+                              if codigo not in cerrados and g_entrada == g[codigo]} | inconsistentes
+                if objetivo in g:
+                    mejor_camino = self._reconstruir_camino(padres, objetivo)
+                    cota_inferior = min((g[c] + h[c] for c in pendientes), default=g[objetivo])
+                    cota = min(peso, g[objetivo] / cota_inferior) if cota_inferior else 1.0
+                    self.estadisticas["cota_suboptimalidad"] = max(cota, 1.0)
+                    self.estadisticas["peso_final"] = peso
+                    soluciones = self.estadisticas["soluciones"]
+                    if not soluciones or (soluciones[-1]["longitud"], soluciones[-1]["cota"]) != (len(mejor_camino), self.estadisticas["cota_suboptimalidad"]):
+                        soluciones.append({
+                            "longitud": len(mejor_camino), "cota": self.estadisticas["cota_suboptimalidad"],
+                            "explorados": explorados, "tiempo": time.perf_counter() - self._inicio,
+                        })
+                if peso <= 1 or not pendientes or self.estadisticas["cota_suboptimalidad"] <= 1:
+                    self.estadisticas["cota_suboptimalidad"] = 1.0
+                    self._memorizar(estado_inicial, mejor_camino)
+                    return mejor_camino, explorados
+
+                # Siguiente pasada con menos peso: los inconsistentes vuelven a abiertos
+                peso = max(1.0, peso - decremento)
+                abiertos = [
+                    (g[c] + peso * h[c], self._clave_desempate(g[c], h[c], contador), g[c], c) for c in pendientes
+                ]
+                heapq.heapify(abiertos)
+                cerrados = set()
+                inconsistentes = set()
+        except BusquedaInterrumpida:
+            if mejor_camino is None:
+                raise
+            return mejor_camino, explorados
+
+    def resolver_tabla(self, estado_inicial: EstadoPuzzle8) -> Tuple[Optional[List[str]], int]:
+        """
+        Sin búsqueda: desde cada estado se avanza al vecino cuya distancia exacta es una
+        menos, hasta llegar al objetivo. Costo O(profundidad) consultas a la tabla.
+        """
+        if estado_inicial.geometria is not GEOMETRIA_3X3:
+            raise ValueError("La tabla de distancias exactas solo cubre el tablero de 3x3")
+        tabla = self.tabla_distancias or TABLA_DISTANCIAS
+        geometria = GEOMETRIA_3X3
+        distancia = tabla.distancia(estado_inicial.tablero)
+        self.estadisticas = {"consultas_tabla": 1}
+        if distancia is None:
+            return None, 0
+
+        camino = []
+        codigo, pos_vacia = estado_inicial.codigo, estado_inicial.pos_vacia
+        while distancia > 0:
+            for mov, nueva_pos in geometria.movimientos_por_posicion[pos_vacia]:
+                siguiente = geometria.mover(codigo, pos_vacia, nueva_pos)
+                self.estadisticas["consultas_tabla"] += 1
+                if tabla.distancia_codigo(siguiente) == distancia - 1:
+                    camino.append(mov)
+                    codigo, pos_vacia, distancia = siguiente, nueva_pos, distancia - 1
+                    break
+        self._memorizar(estado_inicial, camino)
+        return camino, len(camino)
+
+    # IMPLEMENTACIÓN DE IDA*: profundización iterativa sobre el límite de f(n)
+    def resolver_ida(self, estado_inicial: EstadoPuzzle8) -> Tuple[Optional[List[str]], int]:
+        """
+        Búsqueda en profundidad acotada por f(n) sobre un único tablero mutable.
+        La memoria es O(profundidad): solo se guarda el camino actual.
+        """
+        self.estadisticas = {"iteraciones": 0, "limite_final": 0, "acierto_cache": False}
+        if not es_resoluble(estado_inicial.tablero):
+            return None, 0
+        if estado_inicial.es_objetivo():
+            return [], 0
+        memorizado = self._desde_cache(estado_inicial)
+        if memorizado is not None:
+            self.estadisticas["acierto_cache"] = True
+            return memorizado, 0
+
+        geometria = estado_inicial.geometria
+        _, patrones = self._heuristicas(geometria)
+        tablero = estado_inicial.tablero  # copia mutable que se modifica en el lugar
+        camino: List[str] = []
+        self._explorados_ida = 0
+        if patrones is not None:
+            indices = patrones.indices_codigo(estado_inicial.codigo)  # se modifican en el lugar
+            h_inicio = patrones.evaluar(indices)
+        else:
+            indices = None
+            h_inicio = geometria.heuristica(estado_inicial.codigo)
+        self._contexto_ida = (geometria, patrones, indices)
+        self._proximo_control = self._iniciar_control()
+        limite = h_inicio
+        profundidad_maxima = geometria.profundidad_maxima
+
+        while profundidad_maxima is None or limite <= profundidad_maxima:
+            self.estadisticas["iteraciones"] += 1
+            self.estadisticas["limite_final"] = limite
+            resultado = self._buscar_ida(tablero, estado_inicial.pos_vacia, 0, h_inicio, limite, -1, camino)
+            if resultado == ENCONTRADO:
+                self._memorizar(estado_inicial, camino)
+                return camino, self._explorados_ida
+            limite = resultado
+
+        return [], self._explorados_ida
+
+    def _buscar_ida(self, tablero: List[int], pos_vacia: int, g: int, h: int, limite: int,
+                    pos_anterior: int, camino: List[str]) -> int:
+        """Devuelve ENCONTRADO o el menor f(n) que superó el límite en esta iteración"""
+        geometria, patrones, indices = self._contexto_ida
+        self._explorados_ida += 1
+        if self._explorados_ida >= self._proximo_control:
+            # En IDA* el límite actual es la mejor cota inferior conocida de f
+            self._proximo_control = self._controlar(self._explorados_ida, limite)
+        # Con patrones que no cubren todas las piezas, h == 0 no basta para ser objetivo
+        if h == 0 and tablero == geometria.objetivo:
+            return ENCONTRADO
+
+        minimo = INFINITO
+        g_siguiente = g + 1
+        for mov, nueva_pos in geometria.movimientos_por_posicion[pos_vacia]:
+            # Poda del movimiento que deshace el anterior
+            if nueva_pos == pos_anterior:
+                continue
+            pieza = tablero[nueva_pos]
+            grupo = -1
+            if patrones is not None:
+                grupo = patrones.grupo_de[pieza]
+                h_siguiente = h
+                if grupo >= 0:
+                    tabla_grupo = patrones.tablas[grupo]
+                    indice_anterior = indices[grupo]
+                    indice_nuevo = indice_anterior + (pos_vacia - nueva_pos) * patrones.peso[pieza]
+                    h_siguiente = h - tabla_grupo[indice_anterior] + tabla_grupo[indice_nuevo]
+            else:
+                distancias = geometria.distancias_manhattan[pieza]
+                h_siguiente = h - distancias[nueva_pos] + distancias[pos_vacia]
+            f = g_siguiente + h_siguiente
+            if f > limite:
+                if f < minimo:
+                    minimo = f
+                continue
+
+            # Mover en el lugar
+            tablero[pos_vacia], tablero[nueva_pos] = pieza, 0
+            if grupo >= 0:
+                indices[grupo] = indice_nuevo
+            camino.append(mov)
+            resultado = self._buscar_ida(tablero, nueva_pos, g_siguiente, h_siguiente, limite, pos_vacia, camino)
+            if resultado == ENCONTRADO:
+                return ENCONTRADO
+            # Deshacer el movimiento
+            camino.pop()
+            tablero[pos_vacia], tablero[nueva_pos] = 0, pieza
+            if grupo >= 0:
+                indices[grupo] = indice_anterior
+            if resultado < minimo:
+                minimo = resultado
+        return minimo
+
+    def _reconstruir_camino(self, cerrados: Dict[int, Tuple[Optional[int], str]], codigo: int) -> List[str]:
+        """Reconstruye la secuencia de movimientos desde el nodo objetivo hasta el inicial"""
+        camino = []
+        padre, movimiento = cerrados[codigo]
+        while padre is not None:
+            camino.append(movimiento)
+            padre, movimiento = cerrados[padre]
+        return camino[::-1]  # Invierte para obtener el orden correcto
+
+# ========== RESOLUCIÓN POR LOTES ==========
+ALGORITMOS = ("astar", "ida", "tabla")
+
+# Un solucionador por proceso del pool, creado en _iniciar_proceso_lote
+_solucionador_lote: Optional[SolucionadorPuzzle8] = None
+_algoritmo_lote = "astar"
+_peso_lote = 1.0
+
+def _iniciar_proceso_lote(algoritmo: str, tamano_patrones: Optional[int], peso: float):
+    global _solucionador_lote, _algoritmo_lote, _peso_lote
+    patrones = BasePatronesAditiva(tamano_patrones) if tamano_patrones else None
+    _solucionador_lote = SolucionadorPuzzle8(patrones=patrones)
+    _algoritmo_lote = algoritmo
+    _peso_lote = peso
+
+def _resolver_linea(tarea: Tuple[int, str]) -> dict:
+    """Resuelve un tablero escrito como enteros separados por espacios o comas"""
+    numero, linea = tarea
+    resultado = {"linea": numero}
+    try:
+        tablero = [int(valor) for valor in linea.replace(",", " ").split()]
+        resultado["tablero"] = tablero
+        estado = EstadoPuzzle8(tablero)
+        metodo = {
+            "astar": lambda estado: _solucionador_lote.resolver(estado, _peso_lote),
+            "ida": _solucionador_lote.resolver_ida,
+            "tabla": _solucionador_lote.resolver_tabla,
+        }[_algoritmo_lote]
+        inicio = time.perf_counter()
+        camino, explorados = metodo(estado)
+        transcurrido = time.perf_counter() - inicio
+    except Exception as e:
+        resultado["error"] = str(e)
+        return resultado
+    resultado["movimientos"] = camino
+    resultado["longitud"] = len(camino) if camino is not None else None
+    resultado["explorados"] = explorados
+    resultado["tiempo"] = transcurrido
+    return resultado
+
+def _leer_tableros(entrada):
+    """Genera (número de línea, texto) ignorando líneas vacías y comentarios"""
+    for numero, linea in enumerate(entrada, start=1):
+        linea = linea.strip()
+        if linea and not linea.startswith("#"):
+            yield numero, linea
+
+def resolver_lote(entrada, salida, procesos: Optional[int] = None, algoritmo: str = "astar",
+                  tamano_patrones: Optional[int] = None, peso: float = 1.0) -> dict:
+    """
+    Resuelve un tablero por línea de `entrada` repartiendo el trabajo en un pool de procesos.
+    Cada resultado se escribe en `salida` como una línea JSON en cuanto está listo.
+    """
+    if algoritmo not in ALGORITMOS:
+        raise ValueError(f"Algoritmo desconocido: {algoritmo}")
+    if algoritmo == "tabla":
+        # Se genera aquí para que los procesos no construyan el archivo a la vez
+        TABLA_DISTANCIAS.cargar()
+    resumen = {"tableros": 0, "resueltos": 0, "irresolubles": 0, "errores": 0, "explorados": 0}
+    inicio = time.perf_counter()
+    with multiprocessing.Pool(procesos, _iniciar_proceso_lote, (algoritmo, tamano_patrones, peso)) as pool:
+        for resultado in pool.imap_unordered(_resolver_linea, _leer_tableros(entrada), chunksize=16):
+            salida.write(json.dumps(resultado) + "\n")
+            salida.flush()
+            resumen["tableros"] += 1
+            if "error" in resultado:
+                resumen["errores"] += 1
+            elif resultado["movimientos"] is None:
+                resumen["irresolubles"] += 1
+            else:
+                resumen["resueltos"] += 1
+            resumen["explorados"] += resultado.get("explorados", 0)
+
+    transcurrido = time.perf_counter() - inicio
+    resumen["tiempo"] = transcurrido
+    resumen["tableros_por_segundo"] = resumen["tableros"] / transcurrido if transcurrido else 0.0
+    resumen["nodos_por_segundo"] = resumen["explorados"] / transcurrido if transcurrido else 0.0
+    return resumen
+
+# ======== CLASE INTERFAZPUZZLE8 ==========
+class InterfazPuzzle8:
+    def __init__(self, ventana):
+        self.ventana = ventana
+        self.ventana.title("Puzzle 8 - Resolución Automática")
+        self.ventana.geometry("420x620")
+        self.ventana.configure(bg="#2c3e50")
+        # Las soluciones se memorizan entre sesiones: volver a resolver tras unos pasos es inmediato
+        self.solucionador = SolucionadorPuzzle8(cache=CacheSoluciones(ruta=RUTA_CACHE_SOLUCIONES))
+        self.movimientos_solucion = []
+        self.indice_mov = 0
+        self.tablero_fijo = [5, 2, 4, 3, 0, 1, 7, 8, 6] # estado inicial
+        self.estado_actual = EstadoPuzzle8(self.tablero_fijo)
+        # Búsqueda en segundo plano: hilo y resultado (camino, explorados) o excepción
+        self.hilo_busqueda = None
+        self.resultado_busqueda = None
+        self.crear_interfaz()
+        self.actualizar_tablero()
+    
+    def crear_interfaz(self):
+        titulo = tk.Label(
+            self.ventana,
+            text="PUZZLE 8",
+            font=("Arial", 24, "bold"),
+            fg="#ecf0f1",
+            bg="#2c3e50"
+        )
+        titulo.pack(pady=20)
+        
+        self.marco_tablero = tk.Frame(self.ventana, bg="#34495e", relief="raised", bd=3)
+        self.marco_tablero.pack(pady=20)
+        
+        self.botones = []
+        for i in range(3):
+            fila = []
+            for j in range(3):
+                btn = tk.Button(
+                    self.marco_tablero,
+                    text="",
+                    font=("Arial", 18, "bold"),
+                    width=4,
+                    height=2,
+                    bg="#3498db",
+                    fg="white",
+                    relief="raised",
+                    bd=2,
+                    state="disabled"
+                )
+                btn.grid(row=i, column=j, padx=2, pady=2)
+                fila.append(btn)
+            self.botones.append(fila)
+        
+        marco_controles = tk.Frame(self.ventana, bg="#2c3e50")
+        marco_controles.pack(pady=20)
+        
+        estilo_btn = {
+            "font": ("Arial", 12, "bold"),
+            "bg": "#27ae60",
+            "fg": "white",
+            "activebackground": "#2ecc71",
+            "relief": "raised",
+            "bd": 2,
+            "padx": 15,
+            "pady": 5
+        }
+        
+        self.boton_resolver = tk.Button(marco_controles, text="Resolver", command=self.resolver_puzzle, **estilo_btn)
+        self.boton_resolver.pack(side="left", padx=5)
+        self.boton_siguiente = tk.Button(marco_controles, text="Siguiente Paso", command=self.siguiente_paso_solucion, **estilo_btn)
+        self.boton_siguiente.pack(side="left", padx=5)
+        self.boton_cancelar = tk.Button(marco_controles, text="Cancelar", command=self.cancelar_busqueda,
+                                        state="disabled", **{**estilo_btn, "bg": "#c0392b", "activebackground": "#e74c3c"})
+        self.boton_cancelar.pack(side="left", padx=5)
+
+        # Presupuestos de la búsqueda (vacío = sin límite)
+        marco_limites = tk.Frame(self.ventana, bg="#2c3e50")
+        marco_limites.pack()
+        estilo_etiqueta = {"font": ("Arial", 10), "fg": "#ecf0f1", "bg": "#2c3e50"}
+        tk.Label(marco_limites, text="Límite de nodos:", **estilo_etiqueta).grid(row=0, column=0, sticky="e")
+        self.entrada_limite_nodos = tk.Entry(marco_limites, width=10)
+        self.entrada_limite_nodos.grid(row=0, column=1, padx=5, pady=2)
+        tk.Label(marco_limites, text="Límite de tiempo (s):", **estilo_etiqueta).grid(row=1, column=0, sticky="e")
+        self.entrada_limite_tiempo = tk.Entry(marco_limites, width=10)
+        self.entrada_limite_tiempo.grid(row=1, column=1, padx=5, pady=2)
+
+        self.etiqueta_info = tk.Label(
+            self.ventana,
+            text="",
+            font=("Arial", 12),
+            fg="#ecf0f1",
+            bg="#2c3e50",
+            wraplength=350
+        )
+        self.etiqueta_info.pack(pady=10)
+    
+    def actualizar_tablero(self):
+        for i in range(3):
+            for j in range(3):
+                pos = i * 3 + j
+                valor = self.estado_actual.tablero[pos]
+                if valor == 0:
+                    self.botones[i][j].config(text="", bg="#2c3e50", state="disabled")
+                else:
+                    self.botones[i][j].config(text=str(valor), bg="#3498db", state="disabled")
+    
+    def _leer_limite(self, entrada: tk.Entry, tipo):
+        texto = entrada.get().strip()
+        if not texto:
+            return None
+        valor = tipo(texto)
+        if valor <= 0:
+            raise ValueError(texto)
+        return valor
+
+    def resolver_puzzle(self):
+        if self.estado_actual.es_objetivo():
+            self.etiqueta_info.config(text="El puzzle ya está resuelto.")
+            return
+        if self.hilo_busqueda is not None:
+            return
+        try:
+            self.solucionador.limite_nodos = self._leer_limite(self.entrada_limite_nodos, int)
+            self.solucionador.limite_tiempo = self._leer_limite(self.entrada_limite_tiempo, float)
+        except ValueError:
+            messagebox.showerror("Error", "Los límites deben ser números positivos o quedar vacíos.")
+            return
+        self.etiqueta_info.config(text="Resolviendo puzzle... espera...")
+        self.boton_resolver.config(state="disabled")
+        self.boton_siguiente.config(state="disabled")
+        self.boton_cancelar.config(state="normal")
+        
+        # La búsqueda corre en un hilo; la ventana la sondea con after() sin congelarse
+        copia = EstadoPuzzle8(self.estado_actual.tablero)
+        self.resultado_busqueda = None
+        self.hilo_busqueda = threading.Thread(target=self._ejecutar_busqueda, args=(copia,), daemon=True)
+        self.hilo_busqueda.start()
+        self.ventana.after(100, self._sondear_busqueda)
+
+    def _ejecutar_busqueda(self, estado: EstadoPuzzle8):
+        try:
+            self.resultado_busqueda = self.solucionador.resolver(estado)
+        except Exception as e:
+            # BusquedaInterrumpida o cualquier otro error: _sondear_busqueda lo muestra
+            self.resultado_busqueda = e
+            return
+        # Reescribir el JSON completo solo vale la pena si la búsqueda añadió soluciones
+        cache = self.solucionador.cache
+        if cache.sin_guardar:
+            try:
+                cache.guardar()
+            except OSError as e:
+                print(f"No se pudo guardar la caché de soluciones: {e}", file=sys.stderr)
+
+    def cancelar_busqueda(self):
+        if self.hilo_busqueda is not None:
+            self.solucionador.cancelar()
+            self.etiqueta_info.config(text="Cancelando...")
+
+    def _sondear_busqueda(self):
+        if self.hilo_busqueda.is_alive():
+            progreso = self.solucionador.progreso
+            self.etiqueta_info.config(
+                text=f"Resolviendo... {progreso['explorados']} estados explorados, "
+                     f"f = {progreso['f']:g}, {progreso['transcurrido']:.1f} s"
+            )
+            self.ventana.after(100, self._sondear_busqueda)
+            return
+
+        self.hilo_busqueda = None
+        self.boton_resolver.config(state="normal")
+        self.boton_siguiente.config(state="normal")
+        self.boton_cancelar.config(state="disabled")
+        resultado = self.resultado_busqueda
+        if isinstance(resultado, BusquedaInterrumpida):
+            progreso = resultado.progreso
+            self.etiqueta_info.config(
+                text=f"Búsqueda detenida ({resultado.motivo}): {progreso['explorados']} estados explorados, "
+                     f"mejor f = {progreso['f']:g}, {progreso['transcurrido']:.1f} s."
+            )
+            return
+        if isinstance(resultado, Exception):
+            self.etiqueta_info.config(text=f"Error al resolver: {type(resultado).__name__}: {resultado}")
+            return
+
+        solucion, explorados = resultado
+        if solucion is None:
+            self.etiqueta_info.config(text="El tablero no tiene solución.")
+        elif solucion:
+            self.movimientos_solucion = solucion
+            self.indice_mov = 0
+            origen = " (desde la caché)" if self.solucionador.estadisticas.get("acierto_cache") else ""
+            self.etiqueta_info.config(
+                text=f"Solución encontrada{origen}: {len(solucion)} movimientos, {explorados} estados explorados."
+            )
+        else:
+            self.etiqueta_info.config(text="No se pudo encontrar una solución.")
+    
+    def siguiente_paso_solucion(self):
+        if not self.movimientos_solucion:
+            self.etiqueta_info.config(text="Hacer clic en Resolver.")
+            return
+            
+        if self.indice_mov >= len(self.movimientos_solucion):
+            self.etiqueta_info.config(text="No hay más pasos en la solución.")
+            return
+        
+        mov = self.movimientos_solucion[self.indice_mov]
+        nuevo = self.estado_actual.realizar_movimiento(mov)
+        
+        if nuevo:
+            self.estado_actual = nuevo
+            self.indice_mov += 1
+            self.actualizar_tablero()
+            
+            if self.estado_actual.es_objetivo():
+                self.etiqueta_info.config(text="¡Puzzle resuelto!")
+                self.movimientos_solucion = []
+            else:
+                restantes = len(self.movimientos_solucion) - self.indice_mov
+                self.etiqueta_info.config(
+                    text=f"Paso {self.indice_mov}/{len(self.movimientos_solucion)}: {mov}. {restantes} pasos restantes."
+                )
+# ========== FUNCIÓN PRINCIPAL ==========
+def principal():
+    ventana = tk.Tk()
+    app = InterfazPuzzle8(ventana)
+    ventana.update_idletasks()
+    x = (ventana.winfo_screenwidth() - ventana.winfo_width()) // 2
+    y = (ventana.winfo_screenheight() - ventana.winfo_height()) // 2
+    ventana.geometry(f"+{x}+{y}")
+    ventana.mainloop()
+# ========== PUNTO DE ENTRADA ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Puzzle 8 - Resolución Automática")
+    parser.add_argument("--construir-patrones", type=int, metavar="N",
+                        help="genera las bases de patrones aditivas del tablero de NxN y termina")
+    parser.add_argument("--lote", metavar="ARCHIVO",
+                        help="resuelve sin interfaz un tablero por línea ('-' para leer de stdin)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--algoritmo", choices=ALGORITMOS, default="astar")
+    parser.add_argument("--peso", type=float, default=1.0,
+                        help="peso de A* ponderado (1 = óptimo; w > 1 acota la solución a w veces la óptima)")
+    parser.add_argument("--patrones", type=int, metavar="N", default=None,
+                        help="usa las bases de patrones del tablero de NxN como heurística")
+    argumentos = parser.parse_args()
+    if argumentos.construir_patrones:
+        BasePatronesAditiva(argumentos.construir_patrones).construir()
+    elif argumentos.lote:
+        entrada = sys.stdin if argumentos.lote == "-" else open(argumentos.lote, encoding="utf-8")
+        with entrada:
+            resumen = resolver_lote(entrada, sys.stdout, argumentos.procesos, argumentos.algoritmo,
+                                    argumentos.patrones, argumentos.peso)
+        print(
+            f"{resumen['tableros']} tableros ({resumen['resueltos']} resueltos, {resumen['irresolubles']} irresolubles, "
+            f"{resumen['errores']} errores) en {resumen['tiempo']:.2f} s: "
+            f"{resumen['tableros_por_segundo']:.1f} tableros/s, {resumen['nodos_por_segundo']:.0f} nodos/s",
+            file=sys.stderr
+        )
+    else:
+        principal()
\ No newline at end of file